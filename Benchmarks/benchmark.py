@@ -0,0 +1,296 @@
+"""Tool for measuring the running time of the solvers
+over a sweep of problem sizes and for finding slowdowns.
+
+Usage:
+    python benchmark.py run [-o results.json] [--only NAME ...]
+    python benchmark.py compare baseline.json results.json [--threshold 0.1]
+    python benchmark.py startup [--budget 0.5]
+
+Functions:
+    run_benchmarks(names, repeat, warmup, sizes) -> dict
+    compare_results(baseline, current, threshold) -> list
+    measure_startup(repeat) -> tuple(float, list)
+    save_results(results, filename) -> None
+    load_results(filename) -> dict
+"""
+
+import json
+import platform
+from argparse import ArgumentParser
+from datetime import datetime
+from os import cpu_count
+from statistics import median, mean
+from subprocess import run as run_process
+from sys import exit as sys_exit, executable
+from time import perf_counter
+
+import numpy as np
+
+from os.path import abspath as os_abspath, join as os_join
+from sys import path as sys_path
+for lab in ['GaussianElimination', 'CholeskyDecomposition',
+            'IterativeMethod_SLE', 'PowerIteration_EigenvalueAlgorithm',
+            'JacobiEigenvalue', 'TridiagonalMatrixAlgorithm_FDM',
+            'Cauchy_problem']:
+    sys_path.append(os_abspath(os_join(__file__, '..', '..', lab)))
+
+import gaussel as ge
+import cholesky as ch
+import iterative as it
+import powiter as pi
+import jacobi as ja
+import tridiagonal as td
+import methods as cp
+
+
+def _diagonally_dominant(n, rng):
+    return rng.random((n, n)) + n * np.eye(n)
+
+
+def _symmetric(n, rng):
+    B = rng.random((n, n))
+    return (B + B.T) / 2 + n * np.eye(n)
+
+
+def _make_gaussel(n, rng):
+    A, b = _diagonally_dominant(n, rng), rng.random(n)
+    return lambda: ge.solve_system(A.copy(), b, True)
+
+
+def _make_cholesky(n, rng):
+    A, b = _symmetric(n, rng), rng.random(n)
+    return lambda: ch.solve_system(A, b)
+
+
+def _make_iterative(approximate, key):
+    def make(n, rng):
+        A, b = _diagonally_dominant(n, rng), rng.random(n)
+
+        def run():
+            it._log[key].clear()
+            return approximate(A, b, np.zeros(n), 1.e-8)
+
+        return run
+
+    return make
+
+
+def _make_eigenvalues(calculate):
+    def make(n, rng):
+        A = _symmetric(n, rng)
+        return lambda: calculate(A, 1.e-8)
+
+    return make
+
+
+def _make_TDMA(n, rng):
+    below, above = rng.random(n), rng.random(n)
+    main, vector = rng.random(n) + 2, rng.random(n)
+    return lambda: td.solve_TDMA(below, main.copy(), above, vector.copy())
+
+
+def _make_diffeq(n, rng):
+    return lambda: td.solve_diffeq('sin(x) / (1 + x**2)**0.5',
+                                   '-(1 + x + x * cos(x ** 2))', '1',
+                                   -0.1, 1, 0.4, 0.2, 1, 0.5, 1 / n, 0, 1)
+
+
+def _make_Cauchy(method):
+    def make(n, rng):
+        func = '(1 - a * x * x - y * y) / (k - x * y)'
+        return lambda: method(func, 0, 0, 1 / n, n)
+
+    return make
+
+
+# seconds allowed for importing the package with all numeric solvers
+IMPORT_BUDGET = 0.5
+
+# modules which must not be imported by the numeric solvers
+HEAVY_MODULES = ['sympy', 'matplotlib']
+
+_STARTUP_CODE = """
+import sys
+from time import perf_counter
+start = perf_counter()
+import numerical_labworks
+for name in numerical_labworks._MODULES:
+    getattr(numerical_labworks, name)
+print(perf_counter() - start)
+print(' '.join(sorted(set(name.split('.')[0] for name in sys.modules))))
+"""
+
+# name -> (function making the problem of size n, default sizes)
+BENCHMARKS = {
+    'gaussel.solve_system': (_make_gaussel, [10, 20, 40, 80]),
+    'cholesky.solve_system': (_make_cholesky, [10, 20, 40, 80]),
+    'iterative.approximate_Jacobi': (
+        _make_iterative(it.approximate_Jacobi, 'Jacobi'), [10, 50, 100]),
+    'iterative.approximate_Nekrasov': (
+        _make_iterative(it.approximate_Nekrasov, 'Nekrasov'), [10, 50, 100]),
+    'powiter.power_iteration_m': (
+        _make_eigenvalues(pi.power_iteration_m), [10, 100, 300]),
+    'jacobi.calculate_eigenvalues': (
+        _make_eigenvalues(ja.calculate_eigenvalues), [4, 8, 16]),
+    'jacobi.calculate_eigenvalues_m': (
+        _make_eigenvalues(ja.calculate_eigenvalues_m), [4, 8, 16]),
+    'tridiagonal.solve_TDMA': (_make_TDMA, [100, 1000, 10000]),
+    'tridiagonal.solve_diffeq': (_make_diffeq, [10, 50, 200]),
+    'methods.Runge_Kutta': (_make_Cauchy(cp.Runge_Kutta), [10, 100, 1000]),
+    'methods.Euler': (_make_Cauchy(cp.Euler), [10, 100, 1000]),
+    'methods.Adams': (_make_Cauchy(cp.Adams), [10, 100, 1000]),
+}
+
+
+def run_benchmarks(names=None, repeat=5, warmup=1, sizes=None):
+    """Measure the running time of the solvers and return results.
+
+    Arguments:
+    names -- names of benchmarks from BENCHMARKS (default None, all)
+    repeat -- number of measured runs for each size
+    warmup -- number of runs before measurements
+    sizes -- sizes of problems for all benchmarks
+             (default None, the own sizes of each benchmark)
+    """
+
+    results = {'metadata': _machine_metadata(), 'benchmarks': {}}
+    rng = np.random.default_rng(0)
+    for name in names or BENCHMARKS:
+        make, default_sizes = BENCHMARKS[name]
+        results['benchmarks'][name] = {}
+        for n in sizes or default_sizes:
+            for _ in range(warmup):
+                make(n, rng)()
+
+            times = []
+            for _ in range(repeat):
+                run = make(n, rng)
+                start = perf_counter()
+                run()
+                times.append(perf_counter() - start)
+
+            results['benchmarks'][name][str(n)] = {
+                'min': min(times), 'median': median(times),
+                'mean': mean(times), 'times': times,
+            }
+
+    return results
+
+
+def compare_results(baseline, current, threshold=0.1):
+    """Return slowdowns of current results against the baseline.
+
+    Each slowdown is (name, size, baseline time, current time)
+    where the median time has grown by more than the threshold.
+    Arguments:
+    baseline, current -- results of run_benchmarks
+    threshold -- allowed relative growth of the time (default 0.1)
+    """
+
+    slowdowns = []
+    for name, timings in current['benchmarks'].items():
+        for size, timing in timings.items():
+            base = baseline['benchmarks'].get(name, {}).get(size)
+            if base is None:
+                continue
+
+            if timing['median'] > base['median'] * (1 + threshold):
+                slowdowns.append(
+                    (name, size, base['median'], timing['median'])
+                )
+
+    return slowdowns
+
+
+def measure_startup(repeat=5):
+    """Import the package with all solvers in fresh interpreters.
+
+    Return the median import time and the heavy modules
+    which have been imported.
+    Arguments:
+    repeat -- number of interpreters
+    """
+
+    root = os_abspath(os_join(__file__, '..', '..'))
+    times, loaded = [], set()
+    for _ in range(repeat):
+        output = run_process([executable, '-c', _STARTUP_CODE], cwd=root,
+                             capture_output=True, text=True, check=True)
+        seconds, modules = output.stdout.split('\n')[:2]
+        times.append(float(seconds))
+        loaded.update(set(modules.split()) & set(HEAVY_MODULES))
+
+    return median(times), sorted(loaded)
+
+
+def save_results(results, filename):
+    """Write results to the JSON file"""
+    with open(filename, 'w') as file:
+        json.dump(results, file, indent=2)
+
+
+def load_results(filename):
+    """Read results from the JSON file"""
+    with open(filename) as file:
+        return json.load(file)
+
+
+def _machine_metadata():
+    return {
+        'time': datetime.now().isoformat(),
+        'node': platform.node(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+    }
+
+
+def main(args=None):
+    parser = ArgumentParser(description=__doc__.split('\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help='run benchmarks')
+    run.add_argument('-o', '--output', default='bench_results.json')
+    run.add_argument('--only', nargs='+', choices=list(BENCHMARKS))
+    run.add_argument('--repeat', type=int, default=5)
+    run.add_argument('--warmup', type=int, default=1)
+    compare = commands.add_parser('compare', help='find slowdowns')
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=0.1)
+    startup = commands.add_parser('startup', help='check the import time')
+    startup.add_argument('--budget', type=float, default=IMPORT_BUDGET)
+    startup.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(args)
+
+    if args.command == 'startup':
+        seconds, loaded = measure_startup(args.repeat)
+        print('import time {:.3f} s, budget {:.3f} s'.format(seconds,
+                                                             args.budget))
+        if loaded:
+            print('heavy modules imported:', ', '.join(loaded))
+
+        return 1 if seconds > args.budget or loaded else 0
+
+    if args.command == 'run':
+        results = run_benchmarks(args.only, args.repeat, args.warmup)
+        save_results(results, args.output)
+        for name, timings in results['benchmarks'].items():
+            for size, timing in timings.items():
+                print('{:35} {:>6} {:12.6f} s'.format(name, size,
+                                                      timing['median']))
+        return 0
+
+    slowdowns = compare_results(load_results(args.baseline),
+                                load_results(args.current), args.threshold)
+    for name, size, base, current in slowdowns:
+        print('{:35} {:>6} {:12.6f} s -> {:12.6f} s ({:+.0%})'.format(
+            name, size, base, current, current / base - 1))
+
+    return 1 if slowdowns else 0
+
+
+if __name__ == '__main__':
+    sys_exit(main())
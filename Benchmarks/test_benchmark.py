@@ -0,0 +1,46 @@
+from unittest import TestCase, main
+from copy import deepcopy
+from benchmark import (BENCHMARKS, IMPORT_BUDGET, run_benchmarks,
+                       compare_results, measure_startup)
+
+
+class BenchmarkTestCase(TestCase):
+    def setUp(self):
+        """initial set up"""
+        self.results = run_benchmarks(
+            ['gaussel.solve_system', 'tridiagonal.solve_TDMA'],
+            repeat=2, warmup=1, sizes=[4, 8]
+        )
+
+    def test_run_benchmarks(self):
+        """Verify every benchmark runs and the results are complete"""
+        results = run_benchmarks(list(BENCHMARKS), repeat=1, warmup=0,
+                                 sizes=[4])
+        self.assertEqual(set(results['benchmarks']), set(BENCHMARKS))
+        self.assertIn('platform', results['metadata'])
+        timing = self.results['benchmarks']['gaussel.solve_system']['8']
+        self.assertEqual(len(timing['times']), 2)
+        self.assertLessEqual(timing['min'], timing['median'])
+
+    def test_compare_results(self):
+        """Verify only slowdowns beyond the threshold are reported"""
+        self.assertEqual(compare_results(self.results, self.results), [])
+        slower = deepcopy(self.results)
+        timing = slower['benchmarks']['tridiagonal.solve_TDMA']['4']
+        timing['median'] *= 1.5
+        slowdowns = compare_results(self.results, slower, 0.2)
+        self.assertEqual([s[:2] for s in slowdowns],
+                         [('tridiagonal.solve_TDMA', '4')])
+        self.assertEqual(compare_results(self.results, slower, 0.6), [])
+
+    def test_startup(self):
+        """Verify the package is imported within the budget
+        and without sympy and matplotlib
+        """
+        seconds, loaded = measure_startup(repeat=3)
+        self.assertEqual(loaded, [])
+        self.assertLess(seconds, IMPORT_BUDGET)
+
+
+if __name__ == '__main__':
+    main()
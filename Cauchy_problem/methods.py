@@ -1,63 +1,171 @@
 """Tool for solving the first-order ODE(y' = f(x, y))
 by various algorithms.
 
+The right side f is given in string representation, as a list of
+strings for the system of m equations (with the unknowns y1, ..., ym),
+or as a numpy function f(x, y) of the array y of size m.
+sympy is imported only when f is given by formulas.
+
 Functions:
-    finite_differences(ys, m) -> ndarray
-    supremum_abs(func, min_x, max_x, min_y, max_y) -> float
-    Runge_Kutta(func, x0, y0, h, nsteps) -> tuple(ndarray, ndarray)
-    Euler(func, x0, y0, h, nsteps) -> tuple(ndarray, ndarray, float)
-    Adams(func, x0, y0, h, nsteps) -> tuple(ndarray, ndarray)
+    finite_differences(ys, m, compact) -> ndarray
+    supremum_abs(func, min_x, max_x, min_y, max_y,
+                 npoints, nrefinements) -> float
+    Runge_Kutta(func, x0, y0, h, nsteps, params) -> tuple(ndarray, ndarray)
+    Euler(func, x0, y0, h, nsteps, params) -> tuple(ndarray, ndarray, float)
+    Adams(func, x0, y0, h, nsteps, params, order) -> tuple(ndarray, ndarray)
+    integrate_ensemble(func, x0, y0, h, nsteps, params, method,
+                       chunksize, max_workers) -> tuple(ndarray, ndarray)
+    Dormand_Prince(func, x0, y0, x_end, atol, rtol,
+                   h, params) -> tuple(ndarray, ndarray, function, dict)
+    iterate_chunks(func, x0, y0, h, nsteps, chunk_size, every,
+                   method, params) -> generator of tuple(ndarray, ndarray)
+    integrate_to_file(func, x0, y0, h, nsteps, path, chunk_size, every,
+                      method, params, key) -> memmap
+    BDF(func, x0, y0, h, nsteps, params, max_order,
+        tol, max_iter) -> tuple(ndarray, ndarray, dict)
 """
-from sympy import sympify, symbols
-from numpy import zeros, array, exp, hstack
-from matplotlib.pyplot import plot, legend, show
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from os import replace
+from os.path import exists
+from numpy import (zeros, array, exp, asarray, broadcast_shapes, broadcast_to,
+                   arange, concatenate, sqrt, mean, maximum, tensordot,
+                   searchsorted, clip, stack, float64, int64, broadcast_arrays,
+                   multiply, add, newaxis, load, savez, linspace,
+                   unravel_index, argmax, dot, delete, prod, eye, empty,
+                   finfo, isfinite)
+from numpy.polynomial.polynomial import polyfromroots, polyint, polyval
+from numpy.lib.format import open_memmap
+
+if __package__:
+    from ..GaussianElimination import gaussel as ge
+else:
+    from os.path import abspath as os_abspath, join as os_join
+    lib_path = os_abspath(os_join(__file__, '..', '..', 'GaussianElimination'))
+    from sys import path as sys_path
+    sys_path.append(lib_path)
+    import gaussel as ge
+
+# values of the free symbols of f(x, y) used when no others are given
+DEFAULT_PARAMS = {'k': 3, 'a': 3}
+
+# number of the functions compiled for the error estimates of Euler's method
+# kept for reuse, each value of params gives its own function
+_CACHE_SIZE = 64
+
+# Butcher tableau of the Dormand-Prince 5(4) pair, the error estimator
+# (difference of the 5th and 4th order weights) and the coefficients
+# of the continuous extension of 4th order
+_DP_C = array([0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1])
+_DP_A = [
+    array([]),
+    array([1 / 5]),
+    array([3 / 40, 9 / 40]),
+    array([44 / 45, -56 / 15, 32 / 9]),
+    array([19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729]),
+    array([9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656]),
+]
+_DP_B = array([35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84])
+_DP_E = array([-71 / 57600, 0, 71 / 16695, -71 / 1920, 17253 / 339200,
+               -22 / 525, 1 / 40])
+# coefficients alpha of y_n+1, y_n, ... and beta of h f(x_n+1, y_n+1)
+# of the backward differentiation formulas of orders 1 - 6
+_BDF_COEFFICIENTS = {
+    1: (array([1, -1]), 1),
+    2: (array([1, -4 / 3, 1 / 3]), 2 / 3),
+    3: (array([1, -18 / 11, 9 / 11, -2 / 11]), 6 / 11),
+    4: (array([1, -48 / 25, 36 / 25, -16 / 25, 3 / 25]), 12 / 25),
+    5: (array([1, -300 / 137, 300 / 137, -200 / 137, 75 / 137,
+               -12 / 137]), 60 / 137),
+    6: (array([1, -360 / 147, 450 / 147, -400 / 147, 225 / 147,
+               -72 / 147, 10 / 147]), 60 / 147),
+}
+# the largest number of halvings of a step of BDF
+_BDF_MAX_HALVINGS = 30
 
+_DP_P = array([
+    [1, -8048581381 / 2820520608, 8663915743 / 2820520608,
+     -12715105075 / 11282082432],
+    [0, 0, 0, 0],
+    [0, 131558114200 / 32700410799, -68118460800 / 10900136933,
+     87487479700 / 32700410799],
+    [0, -1754552775 / 470086768, 14199869525 / 1410260304,
+     -10690763975 / 1880347072],
+    [0, 127303824393 / 49829197408, -318862633887 / 49829197408,
+     701980252875 / 199316789632],
+    [0, -282668133 / 205662961, 2019193451 / 616988883,
+     -1453857185 / 822651844],
+    [0, 40617522 / 29380423, -110615467 / 29380423,
+     69997945 / 29380423],
+])
 
-def finite_differences(ys, m):
+
+def finite_differences(ys, m, compact=False):
     """Return finite differences to a given order.
-    
+
+    The j-th column holds the differences of order j.
     Arguments:
     ys -- function values
     m -- order of calculated differences
+    compact -- return only m + 1 columns instead of n x n matrix
+               (default False)
     """
 
     n = len(ys)
-    result = zeros((n, n))
+    result = zeros((n, min(n - 1, m) + 1 if compact else n))
     result[:, 0] = ys
     for j in range(min(n - 1, m)):
-        for i in range(n - j - 1):
-            result[i, j + 1] = result[i + 1, j] - result[i, j]
+        result[:n - j - 1, j + 1] = result[1:n - j, j] - result[:n - j - 1, j]
 
     return result
 
 
-def supremum_abs(func, min_x, max_x, min_y, max_y):
+def supremum_abs(func, min_x, max_x, min_y, max_y, npoints=11,
+                 nrefinements=6):
     """Return the supremum module in the domain of definition.
-    
+
+    The rectangle is sampled by the grid at once, then the grid
+    is zoomed in around the current maximum nrefinements times.
     Arguments:
     func -- sympy function of x and y
     (min_x, max_x) -- x-axis segment
     (min_y, max_y) -- y-axis segment
+    npoints -- number of grid points along each axis (default 11)
+    nrefinements -- number of zooms of the grid (default 6)
     """
+    f = _compile_abs(func)
     supremum = 0
+    left, right, bottom, top = min_x, max_x, min_y, max_y
+    for _ in range(nrefinements + 1):
+        xs, ys = linspace(left, right, npoints), linspace(bottom, top, npoints)
+        values = broadcast_to(f(xs[:, newaxis], ys), (npoints, npoints))
+        i, j = unravel_index(argmax(values), values.shape)
+        supremum = max(supremum, values[i, j])
+
+        dx, dy = (right - left) / (npoints - 1), (top - bottom) / (npoints - 1)
+        left, right = max(min_x, xs[i] - dx), min(max_x, xs[i] + dx)
+        bottom, top = max(min_y, ys[j] - dy), min(max_y, ys[j] + dy)
+
+    return float(supremum)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _compile_abs(func):
+    """Return |func(x, y)| as numpy function, compiled once for each func."""
+    from sympy import symbols, lambdify
     x, y = symbols('x, y')
-    dx = (max_x - min_x) / 10
-    dy = (max_y - min_y) / 10
-    y_ = min_y
-    for _ in range(10):
-        x_ = min_x
-        for _ in range(10):
-            x_ += dx
-            value = abs(func.subs({x: x_, y: y_}))
-            if value > supremum:
-                supremum = value
+    return lambdify([x, y], abs(func), 'numpy')
 
-        y_ += dy
 
-    return supremum
+@lru_cache(maxsize=_CACHE_SIZE)
+def _partial_derivatives(func):
+    """Return partial derivatives of func with respect to x and y."""
+    from sympy import symbols
+    x, y = symbols('x, y')
+    return func.diff(x), func.diff(y)
 
 
-def Runge_Kutta(func, x0, y0, h, nsteps):
+def Runge_Kutta(func, x0, y0, h, nsteps, params=None):
     """Solve the first-order ODE(y'=f(x, y)) by the Runge-Kutta method.
 
     Arguments:
@@ -65,25 +173,15 @@ def Runge_Kutta(func, x0, y0, h, nsteps):
     x0, y0 -- initial value
     h -- step size
     nsteps -- number of steps
+    params -- values of free symbols of f, the missing ones
+              are taken from DEFAULT_PARAMS (default None)
     """
-    x, y, k, a = symbols('x, y, k, a')
-    func = sympify(func).subs({k: 3, a: 3})
-
-    xs, ys = zeros(nsteps + 1), zeros(nsteps + 1)
-    xs[0], ys[0] = x0, y0
-    for k in range(nsteps):
-        k1 = h * func.subs({x: xs[k], y: ys[k]})
-        k2 = h * func.subs({x: xs[k] + h / 2, y: ys[k] + k1 / 2})
-        k3 = h * func.subs({x: xs[k] + h / 2, y: ys[k] + k2 / 2})
-        k4 = h * func.subs({x: xs[k] + h, y: ys[k] + k3})
+    f, values = _compile(func, params)
+    return _solve_Runge_Kutta(lambda x_, y_: f(x_, y_, *values),
+                              x0, asarray(y0, float), h, nsteps)
 
-        xs[k + 1] = xs[k] + h
-        ys[k + 1] = ys[k] + (k1 + 2 * k2 + 2 * k3 + k4) / 6
 
-    return xs, ys
-
-
-def Euler(func, x0, y0, h, nsteps):
+def Euler(func, x0, y0, h, nsteps, params=None):
     """Solve the first-order ODE(y' = f(x, y)) by the Euler method.
 
     Arguments:
@@ -91,57 +189,652 @@ def Euler(func, x0, y0, h, nsteps):
     x0, y0 -- initial value
     h -- step size
     nsteps -- number of steps
-    """
-    x, y, k, a = symbols('x, y, k, a')
-    func = sympify(func).subs({k: 3, a: 3})
+    params -- values of free symbols of f, the missing ones
+              are taken from DEFAULT_PARAMS (default None)
 
-    xs, ys = zeros(nsteps + 1), zeros(nsteps + 1)
-    xs[0], ys[0] = x0, y0
-    for k in range(nsteps):
-        xs[k + 1] = xs[k] + h
-        ys[k + 1] = ys[k] + h * func.subs({x: xs[k], y: ys[k]})
+    The error estimate is None for systems and numpy functions.
+    """
+    params = _with_defaults(params)
+    f, values = _compile(func, params)
+    xs, ys = _solve_Euler(lambda x_, y_: f(x_, y_, *values),
+                          x0, asarray(y0, float), h, nsteps)
+    if callable(func) or isinstance(func, (list, tuple)):
+        return xs, ys, None
 
+    from sympy import sympify
+    func = sympify(func).subs(params)
+    dfdx, dfdy = _partial_derivatives(func)
     M1 = supremum_abs(func, min(xs), max(xs), min(ys), max(ys))
-    M2 = supremum_abs(func.diff(x), min(xs), max(xs), min(ys), max(ys))
-    M3 = supremum_abs(func.diff(y), min(xs), max(xs), min(ys), max(ys))
+    M2 = supremum_abs(dfdx, min(xs), max(xs), min(ys), max(ys))
+    M3 = supremum_abs(dfdy, min(xs), max(xs), min(ys), max(ys))
     M4 = M2 + M1 * M3
-    error = M4 / M3 * h * exp(float(M3 * (xs[k] - xs[0])))
+    error = M4 / M3 * h * exp(float(M3 * (xs[-2] - xs[0])))
 
     return xs, ys, error
 
 
-def Adams(func, x0, y0, h, nsteps):
-    """Solve the first-order ODE(y' = f(x, y)) by the Adams method.
+def Adams(func, x0, y0, h, nsteps, params=None, order=5):
+    """Solve the first-order ODE(y' = f(x, y)) by the Adams method
+    (Adams-Bashforth predictor and Adams-Moulton corrector).
+
+    Arguments:
+    func -- f(x, y) in string representation
+    x0, y0 -- initial value
+    h -- step size
+    nsteps -- number of steps
+    params -- values of free symbols of f, the missing ones
+              are taken from DEFAULT_PARAMS (default None)
+    order -- order of the method (default 5)
+    """
+    f, values = _compile(func, params)
+    return _solve_Adams(lambda x_, y_: f(x_, y_, *values),
+                        x0, asarray(y0, float), h, nsteps, order=order)
+
+
+def integrate_ensemble(func, x0, y0, h, nsteps, params=None,
+                       method='Runge_Kutta', chunksize=None, max_workers=None):
+    """Solve the first-order ODE(y' = f(x, y)) for an ensemble of
+    initial values and values of free symbols at once.
+
+    All trajectories advance in lock-step as one state array.
+    Return xs and ys of shape (ensemble, nsteps + 1).
+    Arguments:
+    func -- f(x, y) in string representation
+    x0 -- initial point
+    y0 -- initial values (scalar or array)
+    h -- step size
+    nsteps -- number of steps
+    params -- values of free symbols of f, scalars or arrays
+              broadcastable with y0, the missing ones are taken
+              from DEFAULT_PARAMS (default None)
+    method -- 'Runge_Kutta', 'Euler' or 'Adams'
+    chunksize -- size of the ensemble part solved by one process
+                 (default None, the whole ensemble in this process)
+    max_workers -- number of processes in the pool
+    """
+    params = _with_defaults(params)
+    y0 = asarray(y0, float)
+    values = {name: asarray(value, float) for name, value in params.items()}
+    shape = broadcast_shapes(y0.shape, *[v.shape for v in values.values()])
+    y0 = broadcast_to(y0, shape).ravel()
+    values = {name: broadcast_to(v, shape).ravel()
+              for name, v in values.items()}
+
+    if chunksize is None or len(y0) <= chunksize:
+        return _integrate_chunk(func, x0, y0, h, nsteps, values, method)
+
+    starts = arange(0, len(y0), chunksize)
+    chunks = [(y0[i:i + chunksize],
+               {name: v[i:i + chunksize] for name, v in values.items()})
+              for i in starts]
+    with ProcessPoolExecutor(max_workers) as executor:
+        futures = [executor.submit(_integrate_chunk, func, x0, y0_, h,
+                                   nsteps, values_, method)
+                   for y0_, values_ in chunks]
+        results = [future.result() for future in futures]
+
+    return results[0][0], concatenate([ys for _, ys in results])
+
+
+def Dormand_Prince(func, x0, y0, x_end, atol=1.e-6, rtol=1.e-3, h=None,
+                   params=None):
+    """Solve the first-order ODE(y' = f(x, y)) by the Dormand-Prince
+    embedded Runge-Kutta pair 5(4) with automatic step size control.
+
+    Return points xs and values ys of accepted steps,
+    dense(x) -- continuous approximation of the solution on [x0, x_end]
+    which needs no extra evaluations of f,
+    dict with numbers of evaluations of f, accepted and rejected steps.
+    RuntimeError is raised when the step cannot advance x anymore
+    (e.g. the solution blows up).
+    Arguments:
+    func -- f(x, y) in string representation
+    x0, y0 -- initial value
+    x_end -- right end of the integration segment, x_end > x0
+    atol, rtol -- absolute and relative tolerances
+    h -- initial step size (default None, selected automatically)
+    params -- values of free symbols of f, the missing ones
+              are taken from DEFAULT_PARAMS (default None)
+    """
+    f, values = _compile(func, params)
+    return _solve_Dormand_Prince(lambda x_, y_: f(x_, y_, *values),
+                                 x0, asarray(y0, float), x_end,
+                                 atol, rtol, h)
+
+
+def _solve_Dormand_Prince(f, x0, y0, x_end, atol, rtol, h=None):
+    """Dormand-Prince method for numpy f(x, y) and y0 of any shape."""
+    if not x_end > x0:
+        raise ValueError('right end x_end must be greater than x0')
+
+    stats = {'nfev': 0, 'naccepted': 0, 'nrejected': 0}
+
+    def evaluate(x_, y_):
+        stats['nfev'] += 1
+        return f(x_, y_) + zeros(y0.shape)
+
+    def rms(vector, scale):
+        return sqrt(mean((vector / scale) ** 2))
+
+    K = zeros((7,) + y0.shape)
+    x_, y_ = x0, y0.astype(float64)
+    K[0] = evaluate(x_, y_)
+    if h is None:
+        # the step such that Euler's local error is about the tolerance
+        scale = atol + rtol * abs(y_)
+        d0, d1 = rms(y_, scale), rms(K[0], scale)
+        h = 1.e-6 if d0 < 1.e-5 or d1 < 1.e-5 else 0.01 * d0 / d1
+        K[1] = evaluate(x_ + h, y_ + h * K[0])
+        d2 = rms(K[1] - K[0], scale) / h
+        h1 = (max(1.e-6, h * 1.e-3) if max(d1, d2) <= 1.e-15
+              else (0.01 / max(d1, d2)) ** (1 / 5))
+        h = min(100 * h, h1)
+
+    xs, ys, starts, steps, polys = [x_], [y_], [], [], []
+    while x_ < x_end:
+        h = min(h, x_end - x_)
+        for i in range(1, 6):
+            y_stage = y_ + h * tensordot(_DP_A[i], K[:i], axes=1)
+            K[i] = evaluate(x_ + _DP_C[i] * h, y_stage)
+
+        y_new = y_ + h * tensordot(_DP_B, K[:6], axes=1)
+        K[6] = evaluate(x_ + h, y_new)
+        scale = atol + rtol * maximum(abs(y_), abs(y_new))
+        error = rms(h * tensordot(_DP_E, K, axes=1), scale)
+        if not (isfinite(error) and error <= 1):
+            stats['nrejected'] += 1
+            h *= 0.2 if not isfinite(error) else max(0.2, 0.9 * error ** -0.2)
+            if h < 16 * finfo(float).eps * max(abs(x_), abs(x_end)):
+                raise RuntimeError('step size underflow at x = {}, '
+                                   'the solution may blow up'.format(x_))
+            continue
+
+        factor = 10 if error == 0 else clip(0.9 * error ** (-1 / 5), 0.2, 10)
+
+        stats['naccepted'] += 1
+        starts.append(x_)
+        steps.append(h)
+        polys.append(h * tensordot(_DP_P.T, K, axes=1))
+        x_, y_ = x_ + h, y_new
+        xs.append(x_)
+        ys.append(y_)
+        K[0] = K[6]  # the last stage is the first one of the next step
+        h *= factor
+
+    starts, steps, polys = array(starts), array(steps), array(polys)
+    ys_starts = array(ys[:-1])
+
+    def dense(x):
+        """Return approximate values of the solution at points x."""
+        x = asarray(x, float)
+        i = clip(searchsorted(starts, x, side='right') - 1,
+                 0, len(starts) - 1)
+        theta = (x - starts[i]) / steps[i]
+        powers = stack([theta ** (j + 1) for j in range(4)], axis=-1)
+        value = ys_starts[i]
+        for j in range(4):
+            coefs = powers[..., j].reshape(powers.shape[:-1] + (1,) * y0.ndim)
+            value = value + coefs * polys[i, j]
+
+        return value
+
+    return array(xs), array(ys), dense, stats
+
+
+def iterate_chunks(func, x0, y0, h, nsteps, chunk_size=1024, every=1,
+                   method='Runge_Kutta', params=None):
+    """Solve the first-order ODE(y' = f(x, y)) yielding the solution
+    by chunks, memory does not depend on the number of steps.
+
+    Yield xs and ys of chunk_size points (the last chunk may be shorter).
+    Arguments:
+    func -- f(x, y) in string representation
+    x0, y0 -- initial value
+    h -- step size
+    nsteps -- number of steps
+    chunk_size -- number of points in one chunk
+    every -- only every such point is yielded (default 1, all points)
+    method -- 'Runge_Kutta', 'Euler' or 'Adams'
+    params -- values of free symbols of f, the missing ones
+              are taken from DEFAULT_PARAMS (default None)
+    """
+    f, values = _compile(func, params)
+    tail = asarray(y0, float)[newaxis]
+    for xs, ys, _, _, _ in _iterate_chunks(
+            lambda x_, y_: f(x_, y_, *values), _SOLVERS[method],
+            x0, h, nsteps, chunk_size, every, 0, 0, tail):
+        yield xs, ys
+
+
+def integrate_to_file(func, x0, y0, h, nsteps, path, chunk_size=1024,
+                      every=1, method='Runge_Kutta', params=None, key=None):
+    """Solve the first-order ODE(y' = f(x, y)) writing the solution
+    to the .npy file by chunks.
+
+    Return the file opened as memmap, its rows are x and y.
+    After every chunk the state is saved to the checkpoint
+    path + '.checkpoint.npz', the interrupted integration with
+    the same arguments is resumed from the last written chunk,
+    otherwise the integration starts over.
+    Arguments:
+    func -- f(x, y) in string representation
+    x0, y0 -- initial value
+    h -- step size
+    nsteps -- number of steps
+    path -- name of the .npy file
+    chunk_size -- number of points in one chunk
+    every -- only every such point is written (default 1, all points)
+    method -- 'Runge_Kutta', 'Euler' or 'Adams'
+    params -- values of free symbols of f, the missing ones
+              are taken from DEFAULT_PARAMS (default None)
+    key -- string identifying the numpy function f, the integration
+           with numpy f is resumed only when the key is given
+    """
+    f, values = _compile(func, params)
+    y0 = asarray(y0, float)
+    checkpoint = path + '.checkpoint.npz'
+    task = array([x0, h, nsteps, every])
+    if callable(func):
+        source = None if key is None else repr(key)
+    else:
+        params = _with_defaults(params)
+        source = repr((func, sorted(params.items())))
+
+    step, rows, tail = 0, 0, y0[newaxis]
+    if exists(path) and exists(checkpoint) and source is not None:
+        with load(checkpoint) as state:
+            if ('source' in state.files and str(state['source']) == source
+                    and state['method'] == method
+                    and (state['task'] == task).all()
+                    and state['y0'].shape == y0.shape
+                    and (state['y0'] == y0).all()):
+                step, rows, tail = state['step'], state['rows'], state['tail']
+
+    npoints = nsteps // every + 1
+    shape = (npoints, 1 + y0.size)
+    table = open_memmap(path, 'r+' if rows else 'w+', float64, shape)
+    if table.shape != shape:
+        # the file has been replaced, the integration starts over
+        del table
+        step, rows, tail = 0, 0, y0[newaxis]
+        table = open_memmap(path, 'w+', float64, shape)
+
+    for xs, ys, step, rows, tail in _iterate_chunks(
+            lambda x_, y_: f(x_, y_, *values), _SOLVERS[method],
+            x0, h, nsteps, chunk_size, every, int(step), int(rows), tail):
+        table[rows - len(xs):rows, 0] = xs
+        table[rows - len(xs):rows, 1:] = ys.reshape(len(xs), -1)
+        table.flush()
+        savez(checkpoint + '.tmp.npz', task=task, method=method,
+              source=str(source), y0=y0, step=int64(step), rows=int64(rows),
+              tail=tail)
+        replace(checkpoint + '.tmp.npz', checkpoint)
+
+    del table
+    return open_memmap(path, 'r')
+
+
+def _iterate_chunks(f, solver, x0, h, nsteps, chunk_size, every,
+                    step, rows, tail):
+    """Yield chunks of the solution starting from the given state.
+
+    step -- number of the last computed step
+    rows -- number of already yielded points
+    tail -- last computed values (up to 5), tail[-1] is y at the step
+    """
+    npoints = nsteps // every + 1
+    while rows < npoints:
+        target = min((rows + chunk_size - 1) * every, nsteps)
+        if solver is _solve_Adams and len(tail) == 5:
+            _, ys = solver(f, x0 + step * h, tail[-1], h, target - step,
+                           history=tail[:-1])
+        else:
+            _, ys = solver(f, x0 + step * h, tail[-1], h, target - step)
+
+        steps = step + arange(len(ys))
+        selected = steps % every == 0
+        if rows:
+            selected[0] = False
+
+        tail = concatenate((tail, ys[1:]))[-5:]
+        step, rows = target, rows + selected.sum()
+        yield x0 + h * steps[selected], ys[selected], step, rows, tail
 
-    Return ndarrays of points xs, 
+
+def BDF(func, x0, y0, h, nsteps, params=None, max_order=5, tol=1.e-8,
+        max_iter=4):
+    """Solve the first-order ODE(y' = f(x, y)) by the implicit backward
+    differentiation formulas, which is suitable for stiff equations.
+
+    The order grows from 1 up to max_order as the values are computed.
+    The Jacobian matrix of f and LU decomposition of the Newton matrix
+    are reused over steps while the Newton iterations converge fast.
+    The step on which the Newton iterations do not converge even with
+    the fresh Jacobian matrix is made by two halves (recursively).
+    Return xs, ys and dict with numbers of steps (with the substeps),
+    evaluations of f and the Jacobian matrix, LU decompositions,
+    Newton iterations and halvings of steps.
     Arguments:
     func -- f(x, y) in string representation
     x0, y0 -- initial value
     h -- step size
     nsteps -- number of steps
+    params -- values of free symbols of f, the missing ones
+              are taken from DEFAULT_PARAMS (default None)
+    max_order -- the highest order of the formulas, 1 - 6 (default 5)
+    tol -- accuracy of the Newton iterations
+    max_iter -- number of the Newton iterations before the Jacobian
+                matrix is updated at the current iterate, the updated
+                one gets 3 * max_iter iterations
+    """
+    f, values = _compile(func, params)
+    jacobian = _compile_Jacobian(func, params)
+    y0 = asarray(y0, float)
+    m = y0.size
+    stats = {'nsteps': 0, 'nfev': 0, 'njev': 0, 'nlu': 0, 'nnewton': 0,
+             'nhalvings': 0}
+
+    def evaluate(x_, y_):
+        stats['nfev'] += 1
+        return asarray(f(x_, y_.reshape(y0.shape), *values), float).ravel()
+
+    def evaluate_Jacobian(x_, y_):
+        stats['njev'] += 1
+        if jacobian is not None:
+            return asarray(jacobian(x_, y_.reshape(y0.shape), *values),
+                           float).reshape(m, m)
+
+        # forward differences for numpy functions
+        matrix, fy = empty((m, m)), evaluate(x_, y_)
+        for j in range(m):
+            delta = sqrt(finfo(float).eps) * max(1, abs(y_[j]))
+            shifted = y_.copy()
+            shifted[j] += delta
+            matrix[:, j] = (evaluate(x_, shifted) - fy) / delta
+
+        return matrix
+
+    # the Jacobian matrix and LU decomposition of I - h beta J are shared
+    # by the steps and the substeps
+    state = {'J': None, 'LU': None, 'h_beta': None}
+
+    def solve_equation(x_, y_, psi, h_beta):
+        """Solve y + psi = h beta f(x, y) by Newton's method starting
+        from y, return None when the iterations do not converge.
+        """
+        is_fresh = False
+        while True:
+            if state['J'] is None:
+                state['J'], state['LU'] = evaluate_Jacobian(x_, y_), None
+                is_fresh = True
+
+            if state['LU'] is None or state['h_beta'] != h_beta:
+                stats['nlu'] += 1
+                state['LU'] = ge.decomposition_LU(eye(m) - h_beta * state['J'])
+                state['h_beta'] = h_beta
+
+            start, previous, is_full = y_.copy(), None, False
+            for _ in range(3 * max_iter if is_fresh else max_iter):
+                if is_full:
+                    state['J'] = evaluate_Jacobian(x_, y_)
+                    stats['nlu'] += 1
+                    state['LU'] = ge.decomposition_LU(
+                        eye(m) - h_beta * state['J']
+                    )
+
+                LU, permutation = state['LU']
+                stats['nnewton'] += 1
+                residual = y_ + psi - h_beta * evaluate(x_, y_)
+                dy = ge.solve_LU(LU, permutation, -residual)
+                y_ = y_ + dy
+                norm = abs(dy).max() / (1 + abs(y_).max())
+                if norm < tol:
+                    return y_
+
+                if previous is not None and norm > previous / 2:
+                    if not is_fresh or is_full and norm > previous:
+                        break
+
+                    if not is_full:
+                        # the renewed Jacobian matrix is not enough, the
+                        # iterations are restarted evaluating it at every
+                        # iterate (the full Newton's method)
+                        y_, norm, is_full = start.copy(), None, True
+
+                previous = norm
+
+            if is_fresh:
+                return None
+
+            # the Jacobian matrix is renewed at the current iterate
+            state['J'] = None
+            if not isfinite(y_).all():
+                y_ = start
+
+    def advance(x_, y_, h_, nsteps_, depth):
+        """Make nsteps_ steps of size h_ from y_ and return the values."""
+        ys_ = zeros((nsteps_ + 1, m))
+        ys_[0] = y_
+        for n in range(nsteps_):
+            alphas, beta = _BDF_COEFFICIENTS[min(n + 1, max_order)]
+            psi = tensordot(alphas[1:],
+                            ys_[n + 1 - len(alphas[1:]):n + 1][::-1], axes=1)
+            predictor = 2 * ys_[n] - ys_[n - 1] if n else ys_[n].copy()
+            y_new = solve_equation(x_ + (n + 1) * h_, predictor, psi,
+                                   h_ * beta)
+            if y_new is None:
+                if depth == _BDF_MAX_HALVINGS:
+                    raise RuntimeError('Newton iterations do not converge, '
+                                       'reduce the step size h')
+
+                # the step is made by two halves starting from order 1
+                y_new = advance(x_ + n * h_, ys_[n], h_ / 2, 2, depth + 1)[-1]
+                stats['nhalvings'] += 1
+
+            ys_[n + 1] = y_new
+            stats['nsteps'] += 1
+
+        return ys_
+
+    xs = x0 + h * arange(nsteps + 1)
+    ys = advance(x0, y0.ravel(), h, nsteps, 0)
+    return xs, ys.reshape((nsteps + 1,) + y0.shape), stats
+
+
+def _compile_Jacobian(func, params=None):
+    """Return the Jacobian matrix of f(x, y, *values) as numpy function
+    or None for numpy f.
+
+    Arguments:
+    func -- f(x, y) in string representation or list of them
+    params -- values of free symbols of f, the missing ones
+              are taken from DEFAULT_PARAMS (default None)
+    """
+    if callable(func):
+        return None
+
+    from sympy import sympify, symbols, lambdify, Matrix
+    params = _with_defaults(params)
+    names = sorted(params)
+    if not isinstance(func, (list, tuple)):
+        args = list(symbols(['x', 'y'] + names))
+        return lambdify(args, sympify(func).diff(args[1]), 'numpy')
+
+    unknowns = symbols('y1:%d' % (len(func) + 1))
+    matrix = Matrix([sympify(expr) for expr in func]).jacobian(unknowns)
+    args = [symbols('x'), unknowns] + list(symbols(names))
+    return lambdify(args, matrix, 'numpy')
+
+
+def _integrate_chunk(func, x0, y0, h, nsteps, params, method):
+    """Integrate a part of the ensemble, return xs and ys."""
+    f, values = _compile(func, params)
+    xs, ys = _SOLVERS[method](lambda x_, y_: f(x_, y_, *values),
+                              x0, y0.copy(), h, nsteps)
+    return xs, ys.T
+
+
+def _with_defaults(params):
+    """Return the given values of free symbols over DEFAULT_PARAMS."""
+    return {**DEFAULT_PARAMS, **(params or {})}
+
+
+def _compile(func, params=None):
+    """Return f(x, y, *values) as numpy function and values of free symbols.
+
+    Arguments:
+    func -- f(x, y) in string representation, list of them
+            or numpy function f(x, y)
+    params -- values of free symbols of f, the missing ones
+              are taken from DEFAULT_PARAMS (default None)
     """
-    x, y, k, a = symbols('x, y, k, a')
-    func = sympify(func).subs({k: 3, a: 3})
-
-    xs, ys = Runge_Kutta(func, x0, y0, h, 4)
-    diff_array = finite_differences(array([func.subs({x: x_, y: y_}) * h for x_, y_ in zip(xs, ys)]), 4)
-    differences = array([diff_array[4 - i, i] for i in range(5)])
-    multipliers = array([1. , 1 / 2, 5 / 12, 3 / 8, 251 / 720])
-
-    xs, ys = hstack((xs, zeros(nsteps - 4))), hstack((ys, zeros(nsteps - 4)))
-    for k in range(4, nsteps):
-        xs[k + 1] = xs[k] + h
-        ys[k + 1] = ys[k] + sum(differences * multipliers)
-        
-        temp = differences.copy()
-        differences[0] = h * func.subs({x: xs[k + 1], y: ys[k + 1]})
-        for i in range(4):
-            differences[i + 1] = differences[i] - temp[i]
+    if callable(func):
+        return func, []
+
+    from sympy import sympify, symbols, lambdify
+    params = _with_defaults(params)
+    names = sorted(params)
+    if not isinstance(func, (list, tuple)):
+        args = list(symbols(['x', 'y'] + names))
+        return lambdify(args, sympify(func), 'numpy'), [params[n] for n in names]
+
+    unknowns = symbols('y1:%d' % (len(func) + 1))
+    args = [symbols('x'), unknowns] + list(symbols(names))
+    g = lambdify(args, [sympify(expr) for expr in func], 'numpy')
+
+    def f(x_, y_, *values):
+        return array(broadcast_arrays(*g(x_, y_, *values)))
+
+    return f, [params[name] for name in names]
+
+
+def _solve_Runge_Kutta(f, x0, y0, h, nsteps):
+    """Runge-Kutta method for numpy f(x, y) and y0 of any shape."""
+    xs, ys = x0 + h * arange(nsteps + 1), zeros((nsteps + 1,) + y0.shape)
+    ys[0] = y0
+    # the stage buffers are allocated once and reused on every step
+    k1, k2, k3, k4, y_stage = [zeros(y0.shape) for _ in range(5)]
+    for k in range(nsteps):
+        y_ = ys[k, ...]
+        k1[...] = f(xs[k], y_)
+        k1 *= h
+        multiply(k1, 0.5, out=y_stage)
+        y_stage += y_
+        k2[...] = f(xs[k] + h / 2, y_stage)
+        k2 *= h
+        multiply(k2, 0.5, out=y_stage)
+        y_stage += y_
+        k3[...] = f(xs[k] + h / 2, y_stage)
+        k3 *= h
+        add(y_, k3, out=y_stage)
+        k4[...] = f(xs[k] + h, y_stage)
+        k4 *= h
+
+        k2 += k3
+        k2 *= 2
+        k2 += k1
+        k2 += k4
+        k2 /= 6
+        add(y_, k2, out=ys[k + 1, ...])
 
     return xs, ys
 
 
+def _solve_Euler(f, x0, y0, h, nsteps):
+    """Euler method for numpy f(x, y) and y0 of any shape."""
+    xs, ys = x0 + h * arange(nsteps + 1), zeros((nsteps + 1,) + y0.shape)
+    ys[0] = y0
+    k1 = zeros(y0.shape)
+    for k in range(nsteps):
+        k1[...] = f(xs[k], ys[k, ...])
+        k1 *= h
+        add(ys[k, ...], k1, out=ys[k + 1, ...])
+
+    return xs, ys
+
+
+def _solve_Adams(f, x0, y0, h, nsteps, history=None, order=5):
+    """Adams-Bashforth-Moulton method for numpy f(x, y) and y0 of any shape.
+
+    history -- values at x0 - (order - 1) h, ..., x0 - h (default None,
+               the starting values are found by the Runge-Kutta method)
+    order -- order of the predictor and the corrector
+    """
+    if history is None and nsteps < order - 1:
+        return _solve_Runge_Kutta(f, x0, y0, h, nsteps)
+
+    xs, ys = x0 + h * arange(nsteps + 1), zeros((nsteps + 1,) + y0.shape)
+    if history is None:
+        ys[:order] = _solve_Runge_Kutta(f, x0, y0, h, order - 1)[1]
+        start, window = order - 1, ys[:order]
+    else:
+        ys[0] = y0
+        start = 0
+        window = concatenate((history[len(history) - order + 1:], y0[newaxis]))
+
+    # f values are kept in the circular buffer, f at the step k
+    # is in the row k % order, so the weights are rotated instead
+    predictor, corrector = _Adams_coefficients(order)
+    rotations = arange(order)[:, newaxis] - arange(order)
+    predictors = zeros((order, order))
+    predictors[arange(order)[:, newaxis], rotations % order] = predictor
+    correctors = zeros((order, order))
+    correctors[arange(order)[:, newaxis], (rotations[:, 1:] + 1) % order] = \
+        corrector[1:]
+
+    fs = zeros((order, y0.size))
+    f_views = [row.reshape(y0.shape) for row in fs]
+    for i, k in enumerate(range(start - order + 1, start + 1)):
+        f_views[k % order][...] = f(xs[start] + (k - start) * h, window[i])
+
+    flat = ys.reshape(nsteps + 1, -1)
+    increment, y_predicted, f_predicted = zeros((3, y0.size))
+    y_view = y_predicted.reshape(y0.shape)
+    f_view = f_predicted.reshape(y0.shape)
+    for k in range(start, nsteps):
+        row = k % order
+        dot(predictors[row], fs, out=increment)
+        increment *= h
+        add(flat[k], increment, out=y_predicted)
+        f_view[...] = f(xs[k + 1], y_view)
+
+        dot(correctors[row], fs, out=increment)
+        f_predicted *= corrector[0]
+        increment += f_predicted
+        increment *= h
+        add(flat[k], increment, out=flat[k + 1])
+        f_views[(k + 1) % order][...] = f(xs[k + 1], ys[k + 1, ...])
+
+    return xs, ys
+
+
+@lru_cache(maxsize=None)
+def _Adams_coefficients(order):
+    """Return weights of f values of the Adams-Bashforth (f at x_k, x_k-1,
+    ...) and Adams-Moulton (f at x_k+1, x_k, ...) formulas of the order.
+    """
+    weights = []
+    for nodes in (-arange(order), 1 - arange(order)):
+        weights.append(zeros(order))
+        for j in range(order):
+            others = delete(nodes, j)
+            basis = polyfromroots(others) / prod(nodes[j] - others)
+            antiderivative = polyint(basis)
+            weights[-1][j] = polyval(1, antiderivative) - polyval(0, antiderivative)
+
+    return tuple(weights)
+
+
+_SOLVERS = {
+    'Runge_Kutta': _solve_Runge_Kutta,
+    'Euler': _solve_Euler,
+    'Adams': _solve_Adams,
+}
+
+
 if __name__ == '__main__':
+    from matplotlib.pyplot import plot, legend, show
+
     h = 0.1
     right_boarder = 1
     x0 = 0
@@ -1,6 +1,13 @@
 from unittest import TestCase, main
-from numpy import allclose
-from methods import Runge_Kutta, Adams
+from tempfile import TemporaryDirectory
+from os.path import join
+from numpy import (allclose, array, exp, linspace, sin, cos, outer,
+                   concatenate, isfinite, errstate)
+from sympy import sympify
+import methods
+from methods import (Runge_Kutta, Euler, Adams, integrate_ensemble,
+                     Dormand_Prince, iterate_chunks, integrate_to_file,
+                     supremum_abs, finite_differences, BDF)
 
 
 class MethodsTestCase(TestCase):
@@ -23,6 +30,247 @@ class MethodsTestCase(TestCase):
         print(type(ys1), type(ys2))
         self.assertTrue(allclose(ys1, ys2, atol=1.e-4))
 
+    def test_integrate_ensemble(self):
+        """Verify the ensemble trajectories coincide with the separately
+        computed ones, with and without the process pool
+        """
+
+        y0s = array([0., 0.1, 0.2, -0.1])
+        ks = array([3., 4., 5., 6.])
+        params = {'k': ks, 'a': 2.}
+        for method in (Runge_Kutta, Adams):
+            _, ys = integrate_ensemble(self.func, self.x0, y0s, self.h, 10,
+                                       params, method.__name__)
+            self.assertEqual(ys.shape, (4, 11))
+            for y0, k, ys_ in zip(y0s, ks, ys):
+                _, ys1 = method(self.func, self.x0, y0, self.h, 10,
+                                {'k': k, 'a': 2.})
+                self.assertTrue(allclose(ys1, ys_))
+
+        _, ys2 = integrate_ensemble(self.func, self.x0, y0s, self.h, 10,
+                                    params, 'Adams', chunksize=3)
+        self.assertTrue(allclose(ys, ys2))
+
+    def test_partial_params(self):
+        """Verify the free symbols missing in params take
+        the default values
+        """
+
+        _, ys = Runge_Kutta(self.func, self.x0, self.y0, self.h, 10)
+        _, ys1 = Runge_Kutta(self.func, self.x0, self.y0, self.h, 10, {'a': 3})
+        self.assertTrue(allclose(ys, ys1))
+
+        ks = array([2., 3.])
+        _, ys2 = integrate_ensemble(self.func, self.x0, 0., self.h, 10,
+                                    {'k': ks})
+        for k, ys_ in zip(ks, ys2):
+            _, ys1 = Runge_Kutta(self.func, self.x0, self.y0, self.h, 10,
+                                 {'k': k})
+            self.assertTrue(allclose(ys1, ys_))
+
+        self.assertTrue(allclose(ys2[1], ys))
+        self.assertIsNotNone(Euler(self.func, self.x0, self.y0, self.h, 10,
+                                   {'k': 2})[2])
+
+    def test_compiled_functions_bounded(self):
+        """Verify the sweep over params keeps a bounded number
+        of compiled functions
+        """
+
+        for k in linspace(2, 3, methods._CACHE_SIZE + 4):
+            Euler(self.func, self.x0, self.y0, self.h, 2, {'k': k})
+
+        for cached in (methods._compile_abs, methods._partial_derivatives):
+            self.assertEqual(cached.cache_info().currsize, methods._CACHE_SIZE)
+
+    def test_Dormand_Prince(self):
+        """Verify the adaptive steps and the dense output approximate
+        the exact solution with a given tolerance
+        """
+
+        xs, ys, dense, stats = Dormand_Prince('-2 * x * y', 0, 1, 3,
+                                              atol=1.e-8, rtol=1.e-8)
+        self.assertEqual(xs[-1], 3)
+        self.assertTrue(allclose(ys, exp(-xs ** 2), atol=1.e-7))
+        points = linspace(0, 3, 101)
+        self.assertTrue(allclose(dense(points), exp(-points ** 2), atol=1.e-6))
+        self.assertTrue(allclose(dense(xs), ys))
+
+        # FSAL: six evaluations per step plus two for the initial step
+        self.assertEqual(stats['naccepted'], len(xs) - 1)
+        self.assertEqual(
+            stats['nfev'],
+            2 + 6 * (stats['naccepted'] + stats['nrejected'])
+        )
+
+        for x_end in [0, -1]:
+            with self.assertRaises(ValueError):
+                Dormand_Prince('-2 * x * y', 0, 1, x_end)
+
+        # the solutions blow up at x = 1 and x = 0.5
+        for func, y0 in [('y**2', 1), ('1 / (x - 0.5)', 0)]:
+            with self.assertRaises(RuntimeError):
+                Dormand_Prince(func, 0, y0, 2)
+
+    def test_systems(self):
+        """Verify the methods solve the system given by strings
+        and by numpy function
+        """
+
+        system = ['y2', '-y1']
+        rates = linspace(0, 1, 1000)
+        for method in (Runge_Kutta, Euler, Adams):
+            xs, ys = method(system, 0, [0, 1], 0.01, 100)[:2]
+            self.assertEqual(ys.shape, (101, 2))
+            atol = 1.e-1 if method is Euler else 1.e-6
+            self.assertTrue(allclose(ys[:, 0], sin(xs), atol=atol))
+            self.assertTrue(allclose(ys[:, 1], cos(xs), atol=atol))
+
+            xs, ys = method(lambda x, y: -rates * y, 0, rates + 1, 0.01, 100)[:2]
+            self.assertEqual(ys.shape, (101, 1000))
+            exact_ys = exp(-outer(xs, rates)) * (rates + 1)
+            self.assertTrue(allclose(ys, exact_ys, atol=atol))
+
+    def test_iterate_chunks(self):
+        """Verify the chunks make up the decimated solution"""
+        for method in (Runge_Kutta, Adams):
+            xs, ys = method(self.func, self.x0, self.y0, self.h / 10, 100)
+            chunks = list(iterate_chunks(self.func, self.x0, self.y0,
+                                         self.h / 10, 100, 7, 3,
+                                         method.__name__))
+            self.assertEqual([len(xs_) for xs_, _ in chunks], [7] * 4 + [6])
+            xs_ = concatenate([xs_ for xs_, _ in chunks])
+            ys_ = concatenate([ys_ for _, ys_ in chunks])
+            self.assertTrue(allclose(xs_, xs[::3]))
+            self.assertTrue(allclose(ys_, ys[::3]))
+
+    def test_integrate_to_file(self):
+        """Verify the interrupted integration to file is resumed"""
+        ncalls, limit = [0], [None]
+
+        def failing(x, y):
+            ncalls[0] += 1
+            if limit[0] is not None and ncalls[0] > limit[0]:
+                raise RuntimeError('interrupted')
+
+            return array([y[1], -y[0]])
+
+        _, ys = Adams(failing, 0, [0, 1], 0.01, 300)
+        full_ncalls, ncalls[0], limit[0] = ncalls[0], 0, ncalls[0] // 2
+        with TemporaryDirectory() as directory:
+            path = join(directory, 'solution.npy')
+            with self.assertRaises(RuntimeError):
+                integrate_to_file(failing, 0, [0, 1], 0.01, 300, path,
+                                  chunk_size=20, every=2, method='Adams',
+                                  key='oscillator')
+
+            ncalls[0], limit[0] = 0, None
+            table = integrate_to_file(failing, 0, [0, 1], 0.01, 300, path,
+                                      chunk_size=20, every=2, method='Adams',
+                                      key='oscillator')
+            self.assertLess(ncalls[0], full_ncalls * 2 // 3)
+            self.assertEqual(table.shape, (151, 3))
+            self.assertTrue(allclose(table[:, 1:], ys[::2]))
+            del table
+
+    def test_integrate_to_file_changed_task(self):
+        """Verify the checkpoint of another problem is not resumed"""
+        calls = [0]
+
+        def interrupted(x, y):
+            calls[0] += 1
+            if calls[0] > 30:
+                raise RuntimeError('interrupted')
+
+            return -y
+
+        with TemporaryDirectory() as directory:
+            path = join(directory, 'solution.npy')
+            with self.assertRaises(RuntimeError):
+                integrate_to_file(interrupted, 0, 1, 0.1, 40, path,
+                                  chunk_size=5, key='decay')
+
+            # the same function with another initial value
+            calls[0] = -1000
+            _, ys = Runge_Kutta('-y', 0, 5, 0.1, 40)
+            table = integrate_to_file(interrupted, 0, 5, 0.1, 40, path,
+                                      chunk_size=5, key='decay')
+            self.assertTrue(allclose(table[:, 1], ys))
+            del table
+
+            # the size of the state changes
+            _, ys = Runge_Kutta(['y2', '-y1'], 0, [0, 1], 0.1, 40)
+            table = integrate_to_file(['y2', '-y1'], 0, [0, 1], 0.1, 40, path,
+                                      chunk_size=5)
+            self.assertEqual(table.shape, (41, 3))
+            self.assertTrue(allclose(table[:, 1:], ys))
+            del table
+
+    def test_supremum_abs(self):
+        """Verify the refinement finds the maximum between grid points"""
+        func = sympify('1 - (x - 0.123)**2 - (y - 0.456)**2')
+        self.assertLess(supremum_abs(func, 0, 1, 0, 1, nrefinements=0), 0.999)
+        self.assertAlmostEqual(supremum_abs(func, 0, 1, 0, 1), 1, places=6)
+
+    def test_Adams_order(self):
+        """Verify the error decreases with the order of the Adams method"""
+        errors = []
+        for order in range(1, 7):
+            xs, ys = Adams('-2 * x * y', 0, 1, 0.05, 40, {}, order)
+            errors.append(abs(ys - exp(-xs ** 2)).max())
+
+        self.assertEqual(errors, sorted(errors, reverse=True))
+        self.assertLess(errors[-1], 1.e-7)
+
+    def test_finite_differences(self):
+        """Verify the compact differences coincide with the full table"""
+        ys = exp(linspace(0, 1, 50))
+        full = finite_differences(ys, 4)
+        compact = finite_differences(ys, 4, compact=True)
+        self.assertEqual(compact.shape, (50, 5))
+        self.assertTrue(allclose(full[:, :5], compact))
+        self.assertFalse(full[:, 5:].any())
+
+    def test_BDF(self):
+        """Verify the stiff equation is solved with a step size
+        unstable for the explicit methods and the Jacobian is reused
+        """
+
+        func, rate = '-1000 * (y - cos(x)) - y**3', 1000
+        with errstate(over='ignore', invalid='ignore'):
+            _, ys = Runge_Kutta(func, 0, 0, 0.01, 30, {})
+        self.assertFalse(isfinite(ys[-1]) and abs(ys[-1]) < 10)
+
+        xs, ys, stats = BDF('-1000 * (y - cos(x))', 0, 0, 0.01, 300, {})
+        exact_ys = (rate ** 2 * cos(xs) + rate * sin(xs) -
+                    rate ** 2 * exp(-rate * xs)) / (rate ** 2 + 1)
+        self.assertTrue(allclose(ys[50:], exact_ys[50:], atol=1.e-8))
+        self.assertEqual(stats['njev'], 1)
+
+        xs, ys1, stats1 = BDF(func, 0, 0, 0.01, 300, {})
+        xs, ys2, stats2 = BDF(lambda x, y: -rate * (y - cos(x)) - y ** 3,
+                              0, 0, 0.01, 300, {})
+        self.assertTrue(allclose(ys1, ys2))
+        self.assertLess(stats1['njev'], stats1['nsteps'] / 10)
+        self.assertLess(stats2['nlu'], stats2['nsteps'] / 10)
+
+    def test_BDF_Robertson(self):
+        """Verify the stiff Robertson's problem is solved
+        with large and small step sizes
+        """
+
+        system = ['-0.04*y1 + 1e4*y2*y3',
+                  '0.04*y1 - 1e4*y2*y3 - 3e7*y2**2', '3e7*y2**2']
+        y40 = array([0.7158271, 9.185535e-6, 0.2841637])
+        for h in [0.1, 0.01, 0.001]:
+            nsteps = int(round((40 if h > 0.001 else 1) / h))
+            xs, ys, stats = BDF(system, 0, [1, 0, 0], h, nsteps, {})
+            self.assertTrue(allclose(ys.sum(axis=1), 1))
+            self.assertTrue((ys > -1.e-8).all())
+            if xs[-1] == 40:
+                self.assertTrue(allclose(ys[-1], y40, rtol=1.e-4, atol=0))
+            self.assertLess(stats['njev'], stats['nsteps'] / 10)
+
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -3,6 +3,7 @@ using Cholesky decomposition
 
 Functions:
     solve_system(A, b) -> ndarray
+    solve_triangular(T, b, lower) -> ndarray
     decomposition(matrix) -> ndarray
     print_log() -> None
 """
@@ -10,11 +11,14 @@ Functions:
 import numpy as np
 import cmath
 
-from os.path import abspath as os_abspath, join as os_join
-lib_path = os_abspath(os_join(__file__, '..', '..', 'GaussianElimination'))
-from sys import path as sys_path
-sys_path.append(lib_path)
-import gaussel as ge
+if __package__:
+    from ..GaussianElimination import gaussel as ge
+else:
+    from os.path import abspath as os_abspath, join as os_join
+    lib_path = os_abspath(os_join(__file__, '..', '..', 'GaussianElimination'))
+    from sys import path as sys_path
+    sys_path.append(lib_path)
+    import gaussel as ge
 
 
 def print_log():
@@ -33,6 +37,15 @@ def solve_system(A, b):
     _log['symmetric matrix A'] = A.copy()
     _log['vector b'] = b.copy()
 
+    if ge.cache_stats() is not None:
+        # S is kept by the cache of gaussel, two triangular systems
+        # are solved in O(n^2)
+        S = ge.cached_factorization('Cholesky', A, decomposition)
+        y = solve_triangular(S.T, b, lower=True)
+        x = np.real_if_close(solve_triangular(S, y))
+        _log['vector x (solution of system)'] = x.copy()
+        return x
+
     S = decomposition(A)
     _log['upper triangular matrix S'] = S.copy()
 
@@ -50,6 +63,24 @@ def solve_system(A, b):
     return x
 
 
+def solve_triangular(T, b, lower=False):
+    """Solve system T x = b with triangular matrix T and return x.
+
+    Arguments:
+    T -- upper (or lower) triangular matrix
+    b -- vector
+    lower -- flag of lower triangular matrix (default False)
+    """
+
+    n = T.shape[0]
+    x = np.zeros(n, np.result_type(T, b))
+    rows = range(n) if lower else range(n - 1, -1, -1)
+    for i in rows:
+        x[i] = (b[i] - T[i].dot(x)) / T[i, i]
+
+    return x
+
+
 def decomposition(matrix):
     """Apply Cholesky decomposition to the given matrix.
     
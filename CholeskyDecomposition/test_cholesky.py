@@ -1,5 +1,5 @@
 from unittest import TestCase, main
-from numpy import array, real_if_close, allclose
+from numpy import array, real_if_close, allclose, random
 
 from os.path import abspath as os_abspath, join as os_join
 lib_path = os_abspath(os_join(__file__, '..', '..', 'GaussianElimination'))
@@ -69,5 +69,28 @@ class CholeskyDecompositionTestCase(TestCase):
         self.assertTrue(allclose(A.dot(x), b))
 
 
+    def test_system_solving_cached(self):
+        """Verify the cached decomposition gives the solution of the system"""
+        A = array(
+            [
+                [2, -2, 3, 0.9],
+                [-2, 3, -1, 1],
+                [3, -1, 2, 0.5],
+                [0.9, 1, 0.5, 2.5]
+            ],
+            float
+        )
+
+        ge.enable_cache()
+        try:
+            for b in random.rand(3, 4):
+                x = ch.solve_system(A, b)
+                self.assertTrue(allclose(A.dot(x), b))
+
+            self.assertEqual(ge.cache_stats()['hits'], 2)
+        finally:
+            ge.disable_cache()
+
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
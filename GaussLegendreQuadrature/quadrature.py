@@ -0,0 +1,273 @@
+"""Tool for the numerical integration by Gauss-Legendre quadratures.
+
+The integrand f is given in string representation (the variable x)
+or as a numpy function f(x) working elementwise. The limits a and b may
+be arrays, then the integrals over all intervals are computed at once
+with one call of f for the points of all intervals.
+Nodes and weights of each order are computed once and kept in the table
+TABLE_PATH (.npz file) which is shared by the runs.
+
+Functions:
+    legendre_nodes(n) -> tuple(ndarray, ndarray)
+    Gauss_Legendre(func, a, b, n) -> ndarray
+    composite_Gauss_Legendre(func, a, b, n, m) -> ndarray
+    Gauss_Kronrod(func, a, b, atol, rtol,
+                  max_intervals) -> tuple(ndarray, ndarray, dict)
+"""
+
+from os import fdopen, makedirs, remove, replace
+from os.path import dirname, exists, expanduser, join
+from tempfile import mkstemp
+from zipfile import BadZipFile
+from numpy import (array, asarray, broadcast_arrays, cos, pi, arange, ones,
+                   zeros, abs as np_abs, maximum, concatenate, add, load,
+                   savez, finfo, isfinite, all as np_all)
+
+# file with the nodes and weights computed before
+TABLE_PATH = join(expanduser('~'), '.cache', 'numerical_labworks',
+                  'legendre.npz')
+
+# nonnegative nodes of the 15-point Kronrod rule (the nodes with odd indices
+# are the nodes of the 7-point Gauss rule), its weights and the weights
+# of the Gauss rule
+_KRONROD_NODES = array([
+    0.991455371120812639206854697526329, 0.949107912342758524526189684047851,
+    0.864864423359769072789712788640926, 0.741531185599394439863864773280788,
+    0.586087235467691130294144845693013, 0.405845151377397166906606412076961,
+    0.207784955007898467600689403773245, 0.000000000000000000000000000000000,
+])
+_KRONROD_WEIGHTS = array([
+    0.022935322010529224963732008058970, 0.063092092629978553290700663189204,
+    0.104790010322250183839876322541518, 0.140653259715525918745189590510238,
+    0.169004726639267902826583426598550, 0.190350578064785409913256402421014,
+    0.204432940075298892414161999234649, 0.209482141084727828012999174891714,
+])
+_GAUSS_WEIGHTS = array([
+    0.129484966168869693270611432679082, 0.279705391489276667901467771423780,
+    0.381830050505118944950369775488975, 0.417959183673469387755102040816327,
+])
+
+
+def legendre_nodes(n):
+    """Return the roots of Legendre polynomial of degree n
+    and the weights of Gauss-Legendre quadrature on [-1, 1].
+
+    Arguments:
+    n -- order of quadrature
+    """
+
+    if n < 1:
+        raise ValueError('order of quadrature must be positive')
+
+    nodes = _nodes.get(n)
+    if nodes is None:
+        if not _nodes:
+            _load_table()
+        nodes = _nodes.get(n)
+
+    if nodes is None:
+        nodes = _nodes[n] = _compute_nodes(n)
+        _save_table()
+
+    return nodes
+
+
+def Gauss_Legendre(func, a, b, n=5):
+    """Approximate the integrals of f over [a, b] by quadrature of order n.
+
+    Arguments:
+    func -- integrand f(x)
+    a, b -- limits of integration (scalars or arrays)
+    n -- order of quadrature (default 5)
+    """
+
+    f = _compile(func)
+    xs, ws = legendre_nodes(n)
+    a, b = broadcast_arrays(asarray(a, float), asarray(b, float))
+    center, half = ((a + b) / 2)[..., None], ((b - a) / 2)[..., None]
+    return half[..., 0] * (f(center + half * xs) * ws).sum(axis=-1)
+
+
+def composite_Gauss_Legendre(func, a, b, n=5, m=10):
+    """Approximate the integrals of f over [a, b] by quadrature of order n
+    on m equal subintervals.
+
+    Arguments:
+    func -- integrand f(x)
+    a, b -- limits of integration (scalars or arrays)
+    n -- order of quadrature (default 5)
+    m -- number of subintervals (default 10)
+    """
+
+    a, b = broadcast_arrays(asarray(a, float), asarray(b, float))
+    h = ((b - a) / m)[..., None]
+    lefts = a[..., None] + h * arange(m)
+    return Gauss_Legendre(func, lefts, lefts + h, n).sum(axis=-1)
+
+
+def Gauss_Kronrod(func, a, b, atol=1.e-10, rtol=1.e-10, max_intervals=10000):
+    """Approximate the integrals of f over [a, b] by adaptive
+    7-point Gauss and 15-point Kronrod quadratures.
+
+    The intervals with the estimated error exceeding their share
+    of the tolerance are bisected; the intervals of all integrals
+    are processed by one call of f at each pass.
+    Return integrals, estimates of their errors and statistics.
+    Arguments:
+    func -- integrand f(x)
+    a, b -- limits of integration (scalars or arrays)
+    atol -- absolute accuracy (default 1.e-10)
+    rtol -- relative accuracy (default 1.e-10)
+    max_intervals -- the largest number of intervals
+                     processed at once (default 10000)
+    """
+
+    f = _compile(func)
+    a, b = broadcast_arrays(asarray(a, float), asarray(b, float))
+    shape, a, b = a.shape, a.ravel(), b.ravel()
+    integrals, errors = zeros(a.size), zeros(a.size)
+    lengths = np_abs(b - a)
+    stats = {'passes': 0, 'evaluations': 0, 'intervals': 0}
+
+    # every interval remembers the integral it belongs to
+    owners = arange(a.size)
+    lefts, rights = a, b
+    while owners.size:
+        stats['passes'] += 1
+        stats['intervals'] += owners.size
+        stats['evaluations'] += 15 * owners.size
+        kronrod, gauss = _Kronrod_rule(f, lefts, rights)
+        error = np_abs(kronrod - gauss)
+        if stats['passes'] == 1:
+            estimates = kronrod
+
+        # the tolerance of the interval is proportional to its length
+        tolerance = maximum(atol, rtol * np_abs(estimates[owners]))
+        share = np_abs(rights - lefts) / maximum(lengths[owners],
+                                                 finfo(float).tiny)
+        accepted = (error <= tolerance * share) | ~isfinite(error)
+        if 2 * (~accepted).sum() > max_intervals:
+            accepted[:] = True  # the limit is reached, the estimate is kept
+
+        add.at(integrals, owners[accepted], kronrod[accepted])
+        add.at(errors, owners[accepted], error[accepted])
+
+        owners, lefts, rights = (owners[~accepted], lefts[~accepted],
+                                 rights[~accepted])
+        middles = (lefts + rights) / 2
+        owners = concatenate((owners, owners))
+        lefts, rights = (concatenate((lefts, middles)),
+                         concatenate((middles, rights)))
+
+    return integrals.reshape(shape), errors.reshape(shape), stats
+
+
+def _Kronrod_rule(f, lefts, rights):
+    """Return the 15-point Kronrod and 7-point Gauss approximations."""
+    center, half = (lefts + rights) / 2, (rights - lefts) / 2
+    xs = concatenate((-_KRONROD_NODES, _KRONROD_NODES[-2::-1]))
+    ws = concatenate((_KRONROD_WEIGHTS, _KRONROD_WEIGHTS[-2::-1]))
+    gauss_ws = zeros(15)
+    gauss_ws[1::2] = concatenate((_GAUSS_WEIGHTS, _GAUSS_WEIGHTS[-2::-1]))
+
+    values = f(center[:, None] + half[:, None] * xs)
+    return half * values.dot(ws), half * values.dot(gauss_ws)
+
+
+def _compute_nodes(n):
+    """Find the roots of Legendre polynomial by Newton's method
+    for all of them at once, the polynomial and its derivative are
+    evaluated by the recurrence in O(n).
+    """
+
+    # the asymptotic approximations of the roots are the initial guess
+    xs = cos(pi * (arange(1, n + 1) - 0.25) / (n + 0.5))
+    for _ in range(100):
+        Pn, dPn = _Legendre_polynomial(xs, n)
+        dx = Pn / dPn
+        xs = xs - dx
+        if np_all(np_abs(dx) < 4 * finfo(float).eps):
+            break
+
+    _, dPn = _Legendre_polynomial(xs, n)
+    ws = 2 / (1 - xs ** 2) / dPn ** 2
+    return xs[::-1].copy(), ws[::-1].copy()
+
+
+def _Legendre_polynomial(x, n):
+    """Return values of P_n and its derivative at the points x."""
+    P_prev, P = ones(x.shape), x.copy()
+    for k in range(2, n + 1):
+        P_prev, P = P, ((2 * k - 1) * x * P - (k - 1) * P_prev) / k
+
+    return P, n * (x * P - P_prev) / (x ** 2 - 1)
+
+
+def _load_table():
+    _nodes.update(_read_table())
+
+
+def _read_table():
+    """Return nodes and weights of the table, the damaged table
+    (e.g. cut off) gives nothing and is rebuilt.
+    """
+    nodes = dict()
+    if exists(TABLE_PATH):
+        try:
+            with load(TABLE_PATH) as table:
+                for key in table.files:
+                    if key.startswith('x'):
+                        n = int(key[1:])
+                        nodes[n] = (table[key], table['w' + key[1:]])
+        except (OSError, ValueError, KeyError, EOFError, BadZipFile):
+            return dict()
+
+    return nodes
+
+
+def _save_table():
+    # the nodes saved by other processes meanwhile are kept
+    nodes = _read_table()
+    nodes.update(_nodes)
+    arrays = {}
+    for n, (xs, ws) in nodes.items():
+        arrays['x' + str(n)], arrays['w' + str(n)] = xs, ws
+
+    try:
+        makedirs(dirname(TABLE_PATH), exist_ok=True)
+        # every writer has its own temporary file and the table is
+        # replaced at once, so the readers never see a part of it
+        descriptor, name = mkstemp(suffix='.npz', dir=dirname(TABLE_PATH))
+        try:
+            with fdopen(descriptor, 'wb') as file:
+                savez(file, **arrays)
+            replace(name, TABLE_PATH)
+        except OSError:
+            remove(name)
+            raise
+    except OSError:
+        pass  # the nodes stay in memory only
+
+
+def _compile(func):
+    if callable(func):
+        return func
+
+    from sympy import sympify, lambdify, Symbol
+    x = Symbol('x')
+    f = lambdify(x, sympify(func), 'numpy')
+    # the constant integrand gives a scalar
+    return lambda xs: f(xs) + zeros(asarray(xs).shape)
+
+
+_nodes = dict()
+
+
+if __name__ == '__main__':
+    func = 'sin(x) / x'
+    print('n   Gauss-Legendre on [0.1, 0.4]')
+    for n in range(1, 6):
+        print(n, ' ', Gauss_Legendre(func, 0.1, 0.4, n))
+
+    integral, error, stats = Gauss_Kronrod(func, 0.1, 0.4)
+    print('Gauss-Kronrod:', integral, '+-', error, stats)
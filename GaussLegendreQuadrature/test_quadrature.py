@@ -0,0 +1,88 @@
+from unittest import TestCase, main
+from tempfile import TemporaryDirectory
+from os import listdir
+from os.path import exists, join
+from numpy import allclose, array, exp, sqrt, linspace
+from numpy.polynomial.legendre import leggauss
+import quadrature as qu
+from quadrature import (legendre_nodes, Gauss_Legendre,
+                        composite_Gauss_Legendre, Gauss_Kronrod)
+
+
+class QuadratureTestCase(TestCase):
+    def setUp(self):
+        """initial set up"""
+        self.directory = TemporaryDirectory()
+        self.table_path = qu.TABLE_PATH
+        qu.TABLE_PATH = join(self.directory.name, 'legendre.npz')
+        qu._nodes.clear()
+
+    def tearDown(self):
+        qu.TABLE_PATH = self.table_path
+        qu._nodes.clear()
+        self.directory.cleanup()
+
+    def test_nodes(self):
+        """Verify the nodes and weights and their table on the disk"""
+        for n in [1, 2, 5, 30]:
+            xs, ws = legendre_nodes(n)
+            xs_check, ws_check = leggauss(n)
+            self.assertTrue(allclose(xs, xs_check, rtol=0, atol=1.e-14))
+            self.assertTrue(allclose(ws, ws_check, rtol=0, atol=1.e-14))
+
+        self.assertTrue(exists(qu.TABLE_PATH))
+        qu._nodes.clear()
+        compute_nodes, qu._compute_nodes = qu._compute_nodes, None
+        try:
+            # the nodes must be read from the table
+            self.assertTrue(allclose(legendre_nodes(30)[0], leggauss(30)[0]))
+        finally:
+            qu._compute_nodes = compute_nodes
+
+    def test_damaged_table(self):
+        """Verify the table cut off on the disk is rebuilt"""
+        legendre_nodes(5)
+        legendre_nodes(6)
+        with open(qu.TABLE_PATH, 'r+b') as file:
+            file.truncate(100)
+
+        qu._nodes.clear()
+        xs, _ = legendre_nodes(5)
+        self.assertTrue(allclose(xs, leggauss(5)[0]))
+        qu._nodes.clear()
+        self.assertTrue(allclose(legendre_nodes(5)[0], leggauss(5)[0]))
+        self.assertEqual(listdir(self.directory.name), ['legendre.npz'])
+
+    def test_Gauss_Legendre(self):
+        """Verify the quadrature of order n is exact for polynomials
+        of degree 2n - 1 and the integrals over many intervals
+        """
+
+        self.assertAlmostEqual(
+            float(Gauss_Legendre('x**5 - 3*x**2 + 1', -1, 2, 3)), 4.5
+        )
+        a, b = linspace(0, 1, 5), linspace(1, 3, 5)
+        self.assertTrue(allclose(Gauss_Legendre(exp, a, b, 10),
+                                 exp(b) - exp(a)))
+        self.assertTrue(allclose(composite_Gauss_Legendre('exp(x)', a, b, 3),
+                                 exp(b) - exp(a), rtol=1.e-12))
+
+    def test_Gauss_Kronrod(self):
+        """Verify the adaptive quadrature reaches the accuracy
+        for the integrand with singular derivative
+        """
+
+        b = array([1., 4., 9.])
+        integrals, errors, stats = Gauss_Kronrod(sqrt, 0, b, atol=1.e-10)
+        self.assertTrue(allclose(integrals, 2 / 3 * b ** 1.5, rtol=0,
+                                 atol=1.e-9))
+        self.assertTrue((errors < 1.e-9).all())
+        self.assertGreater(stats['passes'], 1)
+
+        integral, _, stats = Gauss_Kronrod('x**3', 0, 2)
+        self.assertAlmostEqual(float(integral), 4)
+        self.assertEqual(stats['passes'], 1)
+
+
+if __name__ == '__main__':
+    main()
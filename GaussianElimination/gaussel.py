@@ -3,17 +3,37 @@ using Gaussian elimination algorithm
 
 Functions:
     solve_system(A, b, is_modified=False) -> ndarray
+    solve_systems(A, b) -> ndarray
     forward_elimination(matrix) -> None
     forward_elimination_m(matrix) -> None
     back_substitution(matrix) -> ndarray
+    decomposition_LU(A) -> tuple(ndarray, ndarray)
+    solve_LU(LU, permutation, b) -> ndarray
+    enable_cache(max_bytes) -> None
+    disable_cache() -> None
+    cache_stats() -> dict
+    mark_immutable(A) -> ndarray
+    cached_factorization(kind, A, factorize) -> object
     print_log() -> None
+
+When the cache is enabled, solve_system (and cholesky.solve_system)
+keeps factorizations of matrices, so repeated solves with the same
+matrix and different vectors b cost O(n^2).
 """
 
 __all__ = [
-    'solve_system', 'forward_elimination_m', 'forward_elimination',
-    'back_substitution', 'print_log'
+    'solve_system', 'solve_systems', 'forward_elimination_m',
+    'forward_elimination',
+    'back_substitution', 'decomposition_LU', 'solve_LU', 'enable_cache',
+    'disable_cache', 'cache_stats', 'mark_immutable', 'cached_factorization',
+    'print_log'
 ]
 
+from collections import OrderedDict
+from hashlib import blake2b
+from threading import Lock
+from weakref import ref
+
 import numpy as np
 
 
@@ -29,6 +49,12 @@ def solve_system(A, b, is_modified=False):
 
     log['A'] = A
     log['b'] = b
+    if _cache is not None:
+        LU, permutation = cached_factorization('LU', A, decomposition_LU)
+        x = solve_LU(LU, permutation, b)
+        log['solution of system'] = x
+        return x
+
     log['forward elimination is modified'] = is_modified
     extd_matrix = np.hstack((A, np.array([b]).T))
     log['extended matrix'] = extd_matrix.copy()
@@ -43,6 +69,38 @@ def solve_system(A, b, is_modified=False):
     return x
 
 
+def solve_systems(A, b):
+    """Solve many systems of linear equations A[i] x[i] = b[i]
+    at once and return x.
+
+    Forward elimination with the selection of the main elements
+    and back substitution are applied to all systems simultaneously.
+    Arguments:
+    A -- array of k square matrices n x n
+    b -- array of k vectors of size n
+    """
+
+    matrix = np.concatenate(
+        (np.array(A, float), np.array(b, float)[:, :, np.newaxis]), axis=2
+    )
+    k, n = matrix.shape[:2]
+    systems = np.arange(k)
+    for j in range(n):
+        p = j + abs(matrix[:, j:, j]).argmax(axis=1)
+        main_rows = matrix[systems, p]
+        matrix[systems, p] = matrix[:, j]
+        matrix[:, j] = main_rows
+
+        matrix[:, j] /= matrix[:, j, j][:, np.newaxis]
+        matrix[:, j + 1:] -= matrix[:, j + 1:, j, np.newaxis] * matrix[:, np.newaxis, j]
+
+    x = np.zeros((k, n))
+    for i in range(n - 1, -1, -1):
+        x[:, i] = matrix[:, i, n] - (matrix[:, i, i + 1:n] * x[:, i + 1:]).sum(axis=1)
+
+    return x
+
+
 def forward_elimination_m(matrix):
     """Perform the forward elimination over the given matrix.
 
@@ -110,10 +168,175 @@ def back_substitution(matrix):
     return np.real_if_close(x)
 
 
+def decomposition_LU(A):
+    """Apply LU decomposition with selection of the main elements
+    to the given matrix, P A = L U.
+
+    Return matrix holding L below the main diagonal (ones on the main
+    diagonal of L are not stored) and U, and permutation of rows P.
+    Arguments:
+    A -- square matrix
+    """
+
+    LU = np.array(A, np.result_type(np.asarray(A), float))
+    n = LU.shape[0]
+    permutation = np.arange(n)
+    for k in range(n):
+        p = k + abs(LU[k:, k]).argmax()
+        LU[[k, p]] = LU[[p, k]]
+        permutation[[k, p]] = permutation[[p, k]]
+
+        LU[k + 1:, k] /= LU[k, k]
+        LU[k + 1:, k + 1:] -= np.outer(LU[k + 1:, k], LU[k, k + 1:])
+
+    return LU, permutation
+
+
+def solve_LU(LU, permutation, b):
+    """Solve system of linear equations A x = b and return x
+    using LU decomposition of A, the cost is O(n^2).
+
+    Arguments:
+    LU, permutation -- result of decomposition_LU(A)
+    b -- vector (or matrix which columns are right sides)
+    """
+
+    n = LU.shape[0]
+    b = np.asarray(b)
+    x = np.array(b, np.result_type(LU, b, float))[permutation]
+    for i in range(1, n):
+        x[i] -= LU[i, :i].dot(x[:i])
+
+    for i in range(n - 1, -1, -1):
+        x[i] = (x[i] - LU[i, i + 1:].dot(x[i + 1:])) / LU[i, i]
+
+    return x
+
+
+def enable_cache(max_bytes=2 ** 26):
+    """Start keeping factorizations of matrices (the cache is empty).
+
+    Arguments:
+    max_bytes -- the largest total size of kept factorizations,
+                 the least recently used ones are evicted
+    """
+
+    global _cache
+    _cache = _FactorizationCache(max_bytes)
+
+
+def disable_cache():
+    """Stop keeping factorizations of matrices."""
+    global _cache
+    _cache = None
+
+
+def cache_stats():
+    """Return numbers of hits, misses, evictions and hash computations,
+    number and total size of kept factorizations.
+    """
+
+    return None if _cache is None else _cache.stats()
+
+
+def mark_immutable(A):
+    """Make the array read-only and remember its hash.
+
+    The cache does not rehash such an array on every solve. Return A.
+    Attention: the array must not be changed through other views.
+    Arguments:
+    A -- matrix
+    """
+
+    A.flags.writeable = False
+    _immutable[id(A)] = (ref(A, lambda _, key=id(A): _immutable.pop(key, None)),
+                         _hash(A))
+    return A
+
+
+def cached_factorization(kind, A, factorize):
+    """Return factorize(A) taking it from the cache if it is enabled.
+
+    Arguments:
+    kind -- name of factorization, e.g. 'LU'
+    A -- matrix
+    factorize -- function computing the factorization of A
+    """
+
+    if _cache is None:
+        return factorize(A)
+
+    key = (kind,) + _hash(A)
+    factors = _cache.get(key)
+    if factors is None:
+        factors = factorize(A)
+        _cache.put(key, factors)
+
+    return factors
+
+
+class _FactorizationCache:
+    """LRU cache of factorizations bounded by their total size."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.counts = {'hits': 0, 'misses': 0, 'evictions': 0, 'hashes': 0}
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            factors = self._items.get(key)
+            if factors is None:
+                self.counts['misses'] += 1
+                return None
+
+            self.counts['hits'] += 1
+            self._items.move_to_end(key)
+            return factors[0]
+
+    def put(self, key, factors):
+        size = sum(np.asarray(factor).nbytes for factor in
+                   (factors if isinstance(factors, tuple) else (factors,)))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._items:
+                return
+
+            self._items[key] = (factors, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.nbytes -= evicted_size
+                self.counts['evictions'] += 1
+
+    def stats(self):
+        return dict(self.counts, entries=len(self._items), nbytes=self.nbytes)
+
+
+def _hash(A):
+    """Return the digest of contents, the shape and the type of matrix."""
+    marked = _immutable.get(id(A))
+    if marked is not None and marked[0]() is A and not A.flags.writeable:
+        return marked[1]
+
+    if _cache is not None:
+        _cache.counts['hashes'] += 1
+
+    A = np.ascontiguousarray(A)
+    digest = blake2b(A.data, digest_size=16).hexdigest()
+    return digest, A.shape, A.dtype.str
+
+
 def print_log():
     """Print a log that stores step-by-step actions"""
     for key, value in log.items():
         print(key + ':\n', value, end='\n\n')
 
 
-log = dict()
\ No newline at end of file
+log = dict()
+_cache = None
+_immutable = dict()
\ No newline at end of file
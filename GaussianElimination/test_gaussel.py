@@ -1,5 +1,6 @@
 from unittest import TestCase, main
-from numpy import array, random, around, count_nonzero, array_equal
+from numpy import (array, random, around, count_nonzero, array_equal,
+                   allclose, tril, triu, eye)
 from gaussel import *
 
 class GaussianEliminationTestCase(TestCase):
@@ -60,5 +61,67 @@ class GaussianEliminationTestCase(TestCase):
         true_x = array([2 / 3, -43 / 18, 13 / 9, -7 / 18], float)
         self.assertTrue(array_equal(around(x, 5), around(true_x, 5)))
 
+    def test_decomposition_LU(self):
+        """Verify the LU decomposition and the solution of the system"""
+        A = random.rand(50, 50)
+        LU, permutation = decomposition_LU(A)
+        L, U = tril(LU, -1) + eye(50), triu(LU)
+        self.assertTrue(allclose(L.dot(U), A[permutation]))
+
+        LU, permutation = decomposition_LU(self.A)
+        x = solve_LU(LU, permutation, self.b)
+        self.assertTrue(allclose(self.A.dot(x), self.b))
+        B = random.rand(4, 3)
+        X = solve_LU(LU, permutation, B)
+        self.assertTrue(allclose(self.A.dot(X), B))
+
+    def test_solve_systems(self):
+        """Verify the correctness of the solutions of many systems"""
+        A, b = random.rand(20, 6, 6), random.rand(20, 6)
+        A[0] = eye(6)[::-1]  # zeros on the main diagonal
+        x = solve_systems(A, b)
+        for A_, b_, x_ in zip(A, b, x):
+            self.assertTrue(allclose(A_.dot(x_), b_))
+
+    def test_cache(self):
+        """Verify the factorizations are reused and evicted"""
+        enable_cache(max_bytes=2 * 8 * 20 * 21)
+        try:
+            A = random.rand(20, 20) + 20 * eye(20)
+            for _ in range(3):
+                b = random.rand(20)
+                self.assertTrue(allclose(A.dot(solve_system(A, b)), b))
+
+            stats = cache_stats()
+            self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+
+            mark_immutable(A)
+            solve_system(A, b)
+            self.assertEqual(cache_stats()['hashes'], stats['hashes'] + 1)
+
+            for _ in range(3):
+                solve_system(random.rand(20, 20) + 20 * eye(20), b)
+
+            stats = cache_stats()
+            self.assertEqual((stats['entries'], stats['evictions']), (2, 2))
+            self.assertLessEqual(stats['nbytes'], 2 * 8 * 20 * 21)
+        finally:
+            disable_cache()
+
+    def test_cache_complex(self):
+        """Verify the cached decomposition keeps complex matrices"""
+        A = array([[2 + 1j, 1], [1, 3 - 2j]])
+        b = array([1, 2j])
+        enable_cache()
+        try:
+            for _ in range(2):
+                self.assertTrue(allclose(A.dot(solve_system(A, b)), b))
+        finally:
+            disable_cache()
+
+        LU, permutation = decomposition_LU(A)
+        self.assertTrue(allclose(A.dot(solve_LU(LU, permutation, b)), b))
+
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
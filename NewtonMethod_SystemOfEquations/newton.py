@@ -0,0 +1,271 @@
+"""Tool for finding the roots of systems of nonlinear equations F(x) = 0
+by Newton's method and Broyden's method.
+
+The system is given as a list of n strings with the unknowns x1, ..., xn
+and the free symbols given in params, or as a numpy function F(x)
+of the array x of size n (then the Jacobian matrix is approximated
+by finite differences). The Newton steps are found by LU decomposition
+of GaussianElimination lab.
+
+Functions:
+    Newton(func, x0, eps, max_iter, params, reuse) -> tuple(ndarray, dict)
+    Broyden(func, x0, eps, max_iter, params) -> tuple(ndarray, dict)
+    solve_nonlinear_systems(func, x0s, eps, max_iter, params,
+                            method) -> tuple(ndarray, dict)
+"""
+
+from numpy import (array, asarray, arange, empty, zeros, ones, eye, stack,
+                   broadcast_to, einsum, isfinite, maximum, sqrt, finfo, inf,
+                   where, all as np_all)
+from numpy.linalg import norm
+
+if __package__:
+    from ..GaussianElimination import gaussel as ge
+else:
+    from os.path import abspath as os_abspath, join as os_join
+    lib_path = os_abspath(os_join(__file__, '..', '..', 'GaussianElimination'))
+    from sys import path as sys_path
+    sys_path.append(lib_path)
+    import gaussel as ge
+
+
+def Newton(func, x0, eps=1.e-10, max_iter=50, params=None, reuse=1):
+    """Approximate the root of the system F(x) = 0 by Newton's method.
+
+    With reuse > 1 the Jacobian matrix and its LU decomposition
+    are kept for reuse iterations (the chord method), they are renewed
+    earlier when the norm of the residual is not halved by a step.
+    Return the root and statistics.
+    Arguments:
+    func -- F(x) as list of strings or numpy function
+    x0 -- initial approximation
+    eps -- the upper bound on the norm of the last step (default 1.e-10)
+    max_iter -- the largest number of iterations (default 50)
+    params -- values of free symbols of F (default None, no symbols)
+    reuse -- number of iterations with one Jacobian matrix (default 1)
+    """
+
+    stats = {'niter': 0, 'nfev': 0, 'njev': 0, 'nlu': 0, 'converged': False}
+    F, jacobian = _compile(func, params, stats)
+    x = array(x0, float)
+    fx = F(x)
+    age = reuse
+    for _ in range(max_iter):
+        if age >= reuse:
+            J = jacobian(x, fx)
+            stats['njev'] += 1
+            LU, permutation = ge.decomposition_LU(J)
+            stats['nlu'] += 1
+            age = 0
+
+        dx = -ge.solve_LU(LU, permutation, fx)
+        x += dx
+        age += 1
+        stats['niter'] += 1
+
+        fx_new = F(x)
+        if norm(fx_new) > 0.5 * norm(fx):
+            age = reuse  # the old Jacobian matrix is too far from the new one
+
+        fx = fx_new
+        if norm(dx) <= eps:
+            stats['converged'] = True
+            break
+
+        if not np_all(isfinite(x)):
+            break
+
+    return x, stats
+
+
+def Broyden(func, x0, eps=1.e-10, max_iter=50, params=None):
+    """Approximate the root of the system F(x) = 0 by Broyden's method.
+
+    The Jacobian matrix is evaluated and inverted only at x0,
+    then its inverse is corrected by rank-1 updates, so an iteration
+    costs one evaluation of F and O(n^2) operations.
+    Return the root and statistics.
+    Arguments:
+    func -- F(x) as list of strings or numpy function
+    x0 -- initial approximation
+    eps -- the upper bound on the norm of the last step (default 1.e-10)
+    max_iter -- the largest number of iterations (default 50)
+    params -- values of free symbols of F (default None, no symbols)
+    """
+
+    stats = {'niter': 0, 'nfev': 0, 'njev': 0}
+    F, jacobian = _compile(func, params, stats)
+    x0 = array(x0, float)
+    if callable(func):
+        # the numpy function is given for one system
+        F = _apply_to_rows(F)
+        jacobian = _Jacobian_difference(F)
+
+    x, stats = _solve_Broyden(F, jacobian, x0[None], eps, max_iter, stats)
+    stats['converged'] = bool(stats['converged'][0])
+    return x[0], stats
+
+
+def solve_nonlinear_systems(func, x0s, eps=1.e-10, max_iter=50,
+                            params=None, method='Newton'):
+    """Approximate the roots of many systems F(x) = 0 with different
+    initial approximations at once.
+
+    All systems are iterated together: F and its Jacobian matrix
+    are evaluated for all unknowns at once and the linear systems are
+    solved by gaussel.solve_systems; the converged systems drop out.
+    Return the roots and statistics.
+    Arguments:
+    func -- F(x) as list of strings or numpy function of the array x
+            of shape (k, n) returning the array of the same shape
+    x0s -- initial approximations, array of shape (k, n)
+    eps -- the upper bound on the norm of the last step (default 1.e-10)
+    max_iter -- the largest number of iterations (default 50)
+    params -- values of free symbols of F (default None, no symbols)
+    method -- 'Newton' or 'Broyden' (default 'Newton')
+    """
+
+    stats = {'niter': 0, 'nfev': 0, 'njev': 0}
+    F, jacobian = _compile(func, params, stats)
+    x = array(x0s, float)
+    if method == 'Broyden':
+        return _solve_Broyden(F, jacobian, x, eps, max_iter, stats)
+    if method != 'Newton':
+        raise ValueError('unknown method {!r}'.format(method))
+
+    stats['converged'] = zeros(len(x), bool)
+    active = arange(len(x))
+    for _ in range(max_iter):
+        xa = x[active]
+        fx = F(xa)
+        J = jacobian(xa, fx)
+        stats['njev'] += 1
+
+        dx = ge.solve_systems(J, -fx)
+        x[active] = xa + dx
+        stats['niter'] += 1
+
+        steps = norm(dx, axis=1)
+        stats['converged'][active[steps <= eps]] = True
+        active = active[(steps > eps) & isfinite(steps)]
+        if not active.size:
+            break
+
+    return x, stats
+
+
+def _solve_Broyden(F, jacobian, x, eps, max_iter, stats):
+    """Apply Broyden's method to the systems with the unknowns x[i]."""
+    k, n = x.shape
+    stats['converged'] = zeros(k, bool)
+    fx = F(x)
+    J = jacobian(x, fx)
+    stats['njev'] += 1
+
+    # columns of the inverse matrices are found for all systems at once
+    H = stack([ge.solve_systems(J, broadcast_to(e, (k, n))) for e in eye(n)],
+              axis=2)
+    active = arange(k)
+    for _ in range(max_iter):
+        dx = -einsum('kij,kj->ki', H, fx)
+        xa = x[active] + dx
+        x[active] = xa
+        stats['niter'] += 1
+
+        fx_new = F(xa)
+
+        # the good Broyden update of the inverse (Sherman-Morrison formula)
+        Hdf = einsum('kij,kj->ki', H, fx_new - fx)
+        denominator = einsum('ki,ki->k', dx, Hdf)
+        denominator = where(denominator == 0, inf, denominator)
+        H += einsum('ki,kj->kij', (dx - Hdf) / denominator[:, None],
+                    einsum('ki,kij->kj', dx, H))
+        fx = fx_new
+
+        steps = norm(dx, axis=1)
+        stats['converged'][active[steps <= eps]] = True
+        keep = (steps > eps) & isfinite(steps)
+        active, H, fx = active[keep], H[keep], fx[keep]
+        if not active.size:
+            break
+
+    return x, stats
+
+
+def _compile(func, params, stats):
+    """Return F(x) and its Jacobian matrix J(x, F(x)) as numpy functions.
+
+    Both work for the array x of shape (..., n), formulas are compiled
+    by sympy, the Jacobian matrix of numpy F is approximated
+    by finite differences. Every evaluation of F (also the ones
+    of the finite differences) is counted in stats['nfev'].
+    """
+
+    if callable(func):
+        def F(x):
+            stats['nfev'] += 1
+            return func(x)
+
+        return F, _Jacobian_difference(F)
+
+    from sympy import sympify, symbols, lambdify, Matrix
+    params = dict() if params is None else params
+    names = sorted(params)
+    values = [params[name] for name in names]
+    unknowns = symbols('x1:%d' % (len(func) + 1))
+    system = Matrix([sympify(expr) for expr in func])
+    args = list(unknowns) + list(symbols(names))
+    f = lambdify(args, list(system), 'numpy')
+    jacobian = lambdify(args, system.jacobian(unknowns).tolist(), 'numpy')
+
+    def F(x):
+        stats['nfev'] += 1
+        return _stack(f(*_columns(x), *values), x.shape[:-1])
+
+    def J(x, fx):
+        rows = jacobian(*_columns(x), *values)
+        return stack([_stack(row, x.shape[:-1]) for row in rows], axis=-2)
+
+    return F, J
+
+
+def _Jacobian_difference(F):
+    """Return J(x, F(x)) approximated by forward differences."""
+    def J(x, fx):
+        n = x.shape[-1]
+        matrix = empty(x.shape + (n,))
+        for j in range(n):
+            delta = sqrt(finfo(float).eps) * maximum(1, abs(x[..., j]))
+            shifted = x.copy()
+            shifted[..., j] += delta
+            matrix[..., j] = (asarray(F(shifted), float) - fx) / \
+                asarray(delta)[..., None]
+
+        return matrix
+
+    return J
+
+
+def _apply_to_rows(F):
+    return lambda x: array([asarray(F(row), float) for row in x])
+
+
+def _columns(x):
+    return [x[..., j] for j in range(x.shape[-1])]
+
+
+def _stack(entries, shape):
+    """Stack the entries (constant ones are scalars) along the last axis."""
+    return stack([broadcast_to(asarray(entry, float), shape)
+                  for entry in entries], axis=-1)
+
+
+if __name__ == '__main__':
+    system = ['x3 - sin(x1)', 'x3 - sin(x2)', 'x1**2 + x2**2 + x3**2 - 1']
+    x0 = ones(3)
+    for name, solve in [('Newton', Newton), ('Broyden', Broyden)]:
+        x, stats = solve(system, x0)
+        print(name, x, stats)
+
+    x, stats = Newton(system, x0, reuse=4)
+    print('chord', x, stats)
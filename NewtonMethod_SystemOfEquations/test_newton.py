@@ -0,0 +1,94 @@
+from unittest import TestCase, main
+from numpy import allclose, array, sin, stack, linspace, ones
+from newton import Newton, Broyden, solve_nonlinear_systems
+
+
+class NewtonTestCase(TestCase):
+    def setUp(self):
+        """initial set up"""
+        self.system = ['x3 - sin(x1)', 'x3 - sin(x2)',
+                       'x1**2 + x2**2 + x3**2 - 1']
+        self.x0 = ones(3)
+
+    def residual(self, x):
+        return array([x[2] - sin(x[0]), x[2] - sin(x[1]),
+                      x[0] ** 2 + x[1] ** 2 + x[2] ** 2 - 1])
+
+    def test_Newton(self):
+        """Verify Newton's method and the chord method find the root,
+        the latter with fewer Jacobian matrices
+        """
+
+        x, stats = Newton(self.system, self.x0)
+        self.assertTrue(stats['converged'])
+        self.assertTrue(allclose(self.residual(x), 0, atol=1.e-12))
+        self.assertEqual(stats['njev'], stats['niter'])
+
+        x_chord, stats = Newton(self.system, self.x0, reuse=4)
+        self.assertTrue(stats['converged'])
+        self.assertTrue(allclose(x_chord, x))
+        self.assertLess(stats['njev'], stats['niter'])
+
+        # the Jacobian matrix is approximated for numpy function
+        x_numpy, stats = Newton(self.residual, self.x0)
+        self.assertTrue(stats['converged'])
+        self.assertTrue(allclose(x_numpy, x))
+
+    def test_Broyden(self):
+        """Verify Broyden's method finds the root evaluating
+        the Jacobian matrix only once
+        """
+
+        x, _ = Newton(self.system, self.x0)
+        for func in [self.system, self.residual]:
+            x_Broyden, stats = Broyden(func, self.x0)
+            self.assertTrue(stats['converged'])
+            self.assertTrue(allclose(x_Broyden, x))
+            self.assertEqual(stats['njev'], 1)
+
+    def test_many_systems(self):
+        """Verify the roots of many systems solved at once coincide
+        with the roots of the systems solved one by one
+        """
+
+        system = ['x1**2 + x2**2 - r', 'x2 - sin(x1)']
+        x0s = stack([linspace(0.5, 2, 10), linspace(0.2, 1.5, 10)], axis=1)
+        for method in ['Newton', 'Broyden']:
+            xs, stats = solve_nonlinear_systems(system, x0s, params={'r': 2},
+                                                method=method)
+            self.assertTrue(stats['converged'].all())
+            for x0, x in zip(x0s, xs):
+                x_check, _ = Newton(system, x0, params={'r': 2})
+                self.assertTrue(allclose(x, x_check))
+
+        with self.assertRaises(ValueError):
+            solve_nonlinear_systems(system, x0s, method='Halley')
+
+    def test_evaluations_counted(self):
+        """Verify nfev counts every call of numpy F, also the ones
+        of the finite differences
+        """
+
+        calls = [0]
+
+        def residual(x):
+            calls[0] += 1
+            return self.residual(x)
+
+        def residuals(x):
+            calls[0] += 1
+            return stack([self.residual(row) for row in x])
+
+        for solve, func, x0 in [(Newton, residual, self.x0),
+                                (Broyden, residual, self.x0),
+                                (solve_nonlinear_systems, residuals,
+                                 stack([self.x0, 0.9 * self.x0]))]:
+            calls[0] = 0
+            _, stats = solve(func, x0)
+            self.assertEqual(stats['nfev'], calls[0])
+            self.assertGreaterEqual(stats['nfev'],
+                                    stats['niter'] + 3 * stats['njev'])
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,8 @@
 from unittest import TestCase, main
-from sympy import sympify, symbols
-from numpy import array, allclose
-from tridiagonal import solve_diffeq
+from sympy import sympify, symbols, Matrix
+from numpy import array, allclose, random, zeros, eye
+from numpy.linalg import solve
+from tridiagonal import solve_diffeq, solve_diffeq_system, solve_block_TDMA
 
 
 class TridiagonalTestCase(TestCase):
@@ -28,6 +29,54 @@ class TridiagonalTestCase(TestCase):
         exact_ys = array([yx.subs({x: x_}) for x_ in xs], dtype=float)
         self.assertTrue(allclose(ys, exact_ys))
 
+    def test_block_TDMA(self):
+        """Verify the block algorithm agrees with the dense solution."""
+        n, m = 6, 3
+        below, above = random.rand(n, m, m), random.rand(n, m, m)
+        main = random.rand(n, m, m) + 4 * m * eye(m)
+        vector = random.rand(n, m)
+        dense = zeros((n * m, n * m))
+        for i in range(n):
+            dense[i * m:(i + 1) * m, i * m:(i + 1) * m] = main[i]
+            if i > 0:
+                dense[i * m:(i + 1) * m, (i - 1) * m:i * m] = below[i - 1]
+                dense[(i - 1) * m:i * m, i * m:(i + 1) * m] = above[i - 1]
+
+        xs = solve_block_TDMA(below, main, above, vector)
+        self.assertTrue(allclose(xs.ravel(), solve(dense, vector.ravel())))
+
+    def test_model_solution_system(self):
+        """Verify the resulting approximation of the system is correct."""
+        x = symbols('x')
+        yx = Matrix(['2 * sin(x) - 3 * x + 4', 'x**3 + exp(x)'])
+        dyx = yx.diff(x)
+        d2yx = dyx.diff(x)
+
+        h = 1.e-2
+        Px = Matrix([['1', 'x'], ['0', '2']])
+        Qx = Matrix([['-1', '0.5'], ['cos(x)', '-2']])
+        alpha1, alpha2, beta1, beta2 = -1, 1, 1, 1
+        a, b = 0, 1
+
+        Fx = d2yx + Px * dyx + Qx * yx
+        A = alpha1 * yx.subs({x: a}) + alpha2 * dyx.subs({x: a})
+        B = beta1 * yx.subs({x: b}) + beta2 * dyx.subs({x: b})
+        xs, ys = solve_diffeq_system(Px, Qx, Fx, alpha1, alpha2, A,
+                                     beta1, beta2, B, h, a, b)
+        exact_ys = array([list(yx.subs({x: x_})) for x_ in xs], dtype=float)
+        self.assertTrue(allclose(ys, exact_ys, atol=1.e-3))
+
+        # the boundary conditions couple the components of y
+        alpha1, alpha2 = Matrix([[-1, 0.5], [0.3, -1]]), Matrix([[1, 0.2],
+                                                                [0, 1]])
+        beta1, beta2 = Matrix([[1, -0.4], [0.2, 1]]), eye(2)
+        A = alpha1 * yx.subs({x: a}) + alpha2 * dyx.subs({x: a})
+        B = beta1 * yx.subs({x: b}) + beta2 * dyx.subs({x: b})
+        xs, ys = solve_diffeq_system(Px, Qx, Fx, alpha1.tolist(),
+                                     alpha2.tolist(), A, beta1.tolist(),
+                                     beta2, B, h, a, b)
+        self.assertTrue(allclose(ys, exact_ys, atol=1.e-3))
+
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
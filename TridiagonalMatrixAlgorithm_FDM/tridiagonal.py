@@ -5,9 +5,13 @@ Functions:
     solve_TDMA(below, main, above, vector) -> ndarray
     solve_diffeq(px, qx, fx, alpha1, alpha2, A,
                  beta1, beta2, B, h, a, b) -> tuple(ndarray, ndarray)
+    solve_block_TDMA(below, main, above, vector) -> ndarray
+    solve_diffeq_system(Px, Qx, Fx, alpha1, alpha2, A,
+                        beta1, beta2, B, h, a, b) -> tuple(ndarray, ndarray)
 """
-from numpy import zeros, array
-from sympy import sympify, symbols
+from numpy import (zeros, array, empty, eye, broadcast_to, concatenate,
+                   newaxis, ndindex, isscalar)
+from numpy.linalg import solve
 
 
 def solve_diffeq(px, qx, fx, alpha1, alpha2, A, beta1, beta2, B, h, a, b):
@@ -18,6 +22,7 @@ def solve_diffeq(px, qx, fx, alpha1, alpha2, A, beta1, beta2, B, h, a, b):
     alpha1 * y(a) + alpha2 * y'(a) = A
     beta1 * y(b) + beta2 * y'(b) = B
     """
+    from sympy import sympify, symbols
     x = symbols('x')
     px, qx, fx = sympify(px), sympify(qx), sympify(fx)
     if (alpha1 ** 2 + alpha2 ** 2 == 0 or
@@ -73,6 +78,105 @@ def solve_TDMA(below, main, above, vector):
     return xs
 
 
+def solve_diffeq_system(Px, Qx, Fx, alpha1, alpha2, A,
+                        beta1, beta2, B, h, a, b):
+    """solve system of m differential equations of 2nd order:
+
+    Arguments from the system below (y is a vector of size m):
+    y'' + P(x) y' + Q(x) y = F(x), x in [a, b]
+    alpha1 * y(a) + alpha2 * y'(a) = A
+    beta1 * y(b) + beta2 * y'(b) = B
+
+    Px, Qx -- m x m matrices of functions of x (nested lists of strings)
+    Fx -- vector of m functions of x
+    alpha1, alpha2, beta1, beta2 -- m x m matrices or scalars
+    A, B -- vectors of size m
+    """
+    from sympy import symbols, Matrix
+    x = symbols('x')
+    Fx = Matrix(Fx)
+    m = Fx.shape[0]
+    n = int((b - a) / h)
+    xs = array([a + i * h for i in range(n + 1)])
+    P = _evaluate_on_grid(Matrix(Px), x, xs)
+    Q = _evaluate_on_grid(Matrix(Qx), x, xs)
+    F = _evaluate_on_grid(Fx, x, xs)[:, :, 0]
+
+    identity = eye(m)
+    below, main = zeros((n + 1, m, m)), zeros((n + 1, m, m))
+    above, vector = zeros((n + 1, m, m)), zeros((n + 1, m))
+    below[:n - 1] = identity - h / 2 * P[1:n]
+    main[1:n] = - 2 * identity + h ** 2 * Q[1:n]
+    above[1:n] = identity + h / 2 * P[1:n]
+    vector[1:n] = h ** 2 * F[1:n]
+
+    # one-sided differences of 2nd order at the ends of the segment;
+    # y[2] and y[n - 2] are excluded using the adjacent equations
+    alpha1, alpha2, beta1, beta2 = [
+        coef * identity if isscalar(coef) else array(coef, float)
+        for coef in (alpha1, alpha2, beta1, beta2)]
+    coefs = solve(above[1], concatenate(
+        (below[0], main[1], vector[1][:, newaxis]), axis=1))
+    c1, b1, g1 = coefs[:, :m], coefs[:, m:2 * m], coefs[:, 2 * m]
+    main[0] = 2 * h * alpha1 - 3 * alpha2 + alpha2.dot(c1)
+    above[0] = 4 * alpha2 + alpha2.dot(b1)
+    vector[0] = 2 * h * array(A, float).ravel() + alpha2.dot(g1)
+
+    coefs = solve(below[n - 2], concatenate(
+        (main[n - 1], above[n - 1], vector[n - 1][:, newaxis]), axis=1))
+    b2, a2, g2 = coefs[:, :m], coefs[:, m:2 * m], coefs[:, 2 * m]
+    main[n] = 2 * h * beta1 + 3 * beta2 - beta2.dot(a2)
+    below[n - 1] = - 4 * beta2 - beta2.dot(b2)
+    vector[n] = 2 * h * array(B, float).ravel() - beta2.dot(g2)
+
+    return xs, solve_block_TDMA(below, main, above, vector)
+
+
+def solve_block_TDMA(below, main, above, vector):
+    '''solve SoLE Ax = b with block tridiagonal matrix A
+    by block Thomas algorithm, the cost is O(n m^3)
+
+    Arguments:
+    below -- n blocks m x m below the main diagonal (the last is unused)
+    main -- n blocks m x m on the main diagonal
+    above -- n blocks m x m above the main diagonal (the last is unused)
+    vector -- vector b split into n parts of size m
+    '''
+    n_equations, m = len(vector), len(vector[0])
+    gammas, deltas = zeros((n_equations, m, m)), zeros((n_equations, m))
+    main_k, vector_k = main[0], vector[0]
+    for i in range(n_equations):
+        if i > 0:
+            main_k = main[i] - below[i - 1].dot(gammas[i - 1])
+            vector_k = vector[i] - below[i - 1].dot(deltas[i - 1])
+
+        if i == n_equations - 1:
+            deltas[i] = solve(main_k, vector_k)
+            break
+
+        # one LU factorization of the diagonal block for both right sides
+        rhs = concatenate((above[i], array(vector_k)[:, newaxis]), axis=1)
+        coefs = solve(main_k, rhs)
+        gammas[i], deltas[i] = coefs[:, :m], coefs[:, m]
+
+    xs = deltas
+    for i in range(n_equations - 2, -1, -1):
+        xs[i] = deltas[i] - gammas[i].dot(xs[i + 1])
+
+    return xs
+
+
+def _evaluate_on_grid(matrix, x, xs):
+    """Return values of the sympy matrix at all grid points at once."""
+    from sympy import lambdify
+    values = empty((len(xs),) + matrix.shape)
+    for i, j in ndindex(matrix.shape):
+        values[:, i, j] = broadcast_to(
+            lambdify(x, matrix[i, j], 'numpy')(xs), xs.shape)
+
+    return values
+
+
 if __name__ == '__main__':
     px = 'sin(x) / (1 + x**2)**0.5'
     qx = '-(1 + x + x * cos(x ** 2))'
@@ -0,0 +1,74 @@
+"""Package exposing the solvers of the laboratory works.
+
+The modules of the labs are available as attributes (gaussel, cholesky,
+iterative, powiter, jacobi, tridiagonal, methods, quadrature, newton)
+together with the solvers which names are unique across the labs, for example
+numerical_labworks.solve_TDMA or numerical_labworks.Runge_Kutta.
+A module is imported on the first access to it, so importing
+the package costs almost nothing; sympy and matplotlib are imported
+only by the code paths which need them.
+"""
+
+from importlib import import_module
+from os.path import abspath, dirname, isdir, join
+
+# in the source tree the labs lie next to the package directory
+if not isdir(join(dirname(abspath(__file__)), 'GaussianElimination')):
+    __path__.append(dirname(dirname(abspath(__file__))))
+
+_MODULES = {
+    'gaussel': 'GaussianElimination.gaussel',
+    'cholesky': 'CholeskyDecomposition.cholesky',
+    'iterative': 'IterativeMethod_SLE.iterative',
+    'powiter': 'PowerIteration_EigenvalueAlgorithm.powiter',
+    'jacobi': 'JacobiEigenvalue.jacobi',
+    'tridiagonal': 'TridiagonalMatrixAlgorithm_FDM.tridiagonal',
+    'methods': 'Cauchy_problem.methods',
+    'quadrature': 'GaussLegendreQuadrature.quadrature',
+    'newton': 'NewtonMethod_SystemOfEquations.newton',
+}
+
+_FUNCTIONS = {
+    'gaussel': ['solve_systems', 'forward_elimination',
+                'forward_elimination_m', 'back_substitution',
+                'decomposition_LU', 'solve_LU', 'enable_cache',
+                'disable_cache', 'cache_stats', 'mark_immutable'],
+    'cholesky': ['decomposition', 'solve_triangular'],
+    'iterative': ['perform_iteration_Jacobi', 'perform_iteration_Nekrasov',
+                  'approximate_Jacobi', 'approximate_Nekrasov'],
+    'powiter': ['power_iteration', 'power_iteration_m'],
+    'jacobi': ['calculate_eigenvalues', 'calculate_eigenvalues_m'],
+    'tridiagonal': ['solve_TDMA', 'solve_diffeq', 'solve_block_TDMA',
+                    'solve_diffeq_system'],
+    'methods': ['finite_differences', 'supremum_abs', 'Runge_Kutta', 'Euler',
+                'Adams', 'integrate_ensemble', 'Dormand_Prince',
+                'iterate_chunks', 'integrate_to_file', 'BDF'],
+    'quadrature': ['legendre_nodes', 'Gauss_Legendre',
+                   'composite_Gauss_Legendre', 'Gauss_Kronrod'],
+    'newton': ['Newton', 'Broyden', 'solve_nonlinear_systems'],
+}
+
+_FUNCTION_MODULES = {
+    function: module
+    for module, functions in _FUNCTIONS.items() for function in functions
+}
+
+__all__ = list(_MODULES) + list(_FUNCTION_MODULES)
+
+
+def __getattr__(name):
+    if name in _MODULES:
+        module = import_module('.' + _MODULES[name], __name__)
+        globals()[name] = module
+        return module
+
+    if name in _FUNCTION_MODULES:
+        return getattr(__getattr__(_FUNCTION_MODULES[name]), name)
+
+    raise AttributeError(
+        'module {!r} has no attribute {!r}'.format(__name__, name)
+    )
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
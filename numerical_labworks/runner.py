@@ -0,0 +1,282 @@
+"""Tool for running the solvers over a set of problems in a process pool.
+
+The manifest is a JSONL file with one task per line
+    {"id": "t1", "solver": "gaussel.solve_system",
+     "args": {"A": [[2, 1], [1, 3]], "b": [1, 2]}}
+or a .npz file where the arrays "<id>.<argument>" are the arguments
+of the task <id> and the string "<id>.solver" is its solver.
+Solver is "<module>.<function>" of numerical_labworks (one of the
+functions exposed by the package or solve_system), numeric lists
+are passed to it as ndarrays. Results are appended to the JSONL file
+as the tasks finish, one line per task with its status and time;
+a failed task does not stop the others (the task killing its process
+is found and only it fails), and the rerun skips the tasks which have
+been completed.
+
+Usage:
+    python -m numerical_labworks.runner manifest results.jsonl
+                                        [--workers N] [--chunksize K]
+
+Functions:
+    read_manifest(filename) -> generator of dict
+    run_tasks(tasks, output, max_workers, chunksize) -> dict
+"""
+
+import json
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from importlib import import_module
+from inspect import isfunction
+from itertools import islice
+from os import cpu_count
+from os.path import exists
+from time import perf_counter
+from traceback import format_exception_only
+
+import numpy as np
+
+
+def read_manifest(filename):
+    """Yield tasks of the JSONL or .npz manifest one by one.
+
+    Arguments:
+    filename -- name of the manifest
+    """
+
+    if not filename.endswith('.npz'):
+        with open(filename) as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+        return
+
+    with np.load(filename) as arrays:
+        task = None
+        for key in arrays.files:
+            task_id, name = key.rsplit('.', 1)
+            if task is None or task['id'] != task_id:
+                if task is not None:
+                    yield task
+
+                task = {'id': task_id, 'args': {}}
+
+            if name == 'solver':
+                task['solver'] = str(arrays[key])
+            else:
+                task['args'][name] = arrays[key]
+
+        if task is not None:
+            yield task
+
+
+def run_tasks(tasks, output, max_workers=None, chunksize=16):
+    """Solve the tasks in the process pool and append results to output.
+
+    Return numbers of completed, failed and skipped tasks.
+    Arguments:
+    tasks -- iterable of tasks (dicts with id, solver and args)
+    output -- name of the JSONL file with results
+    max_workers -- number of processes (default None, number of CPUs)
+    chunksize -- number of tasks sent to a process at once
+    """
+
+    completed = _completed_tasks(output)
+    counts = {'ok': 0, 'error': 0, 'skipped': 0}
+
+    def pending():
+        for task in tasks:
+            if task['id'] in completed:
+                counts['skipped'] += 1
+            else:
+                yield task
+
+    pending = pending()
+    max_workers = max_workers or cpu_count()
+    # only a few chunks are in flight, so the manifest is streamed
+    limit = 2 * max_workers
+    # chunks which were in flight when a process died, they are run
+    # one at a time (halving them) to find the tasks killing processes
+    suspects = deque()
+    chunks = {}
+    executor = ProcessPoolExecutor(max_workers)
+    try:
+        with open(output, 'a') as file:
+            def write(records):
+                for record in records:
+                    counts[record['status']] += 1
+                    file.write(json.dumps(record) + '\n')
+
+                file.flush()
+
+            is_isolated = False
+            while True:
+                is_broken = False
+                while not is_isolated and len(chunks) < limit:
+                    if suspects:
+                        if chunks:
+                            break  # the suspect waits for the others
+
+                        chunk, is_isolated = suspects.popleft(), True
+                    else:
+                        chunk = list(islice(pending, chunksize))
+                        if not chunk:
+                            break
+
+                    try:
+                        chunks[executor.submit(_run_chunk, chunk)] = chunk
+                    except BrokenProcessPool:
+                        suspects.appendleft(chunk)
+                        is_broken = True
+                        break
+
+                if not chunks and not is_broken:
+                    break
+
+                done, _ = wait(chunks, return_when=FIRST_COMPLETED)
+                lost = []
+                for future in done:
+                    chunk = chunks.pop(future)
+                    try:
+                        records = future.result()
+                    except BrokenProcessPool:
+                        lost.append(chunk)
+                        continue
+                    except Exception as error:
+                        records = [_error_record(task, error, 0)
+                                   for task in chunk]
+
+                    write(records)
+
+                is_isolated = is_isolated and bool(chunks)
+                if not lost and not is_broken:
+                    continue
+
+                # the pool is broken, all chunks in flight are lost
+                lost.extend(chunks.values())
+                chunks.clear()
+                is_isolated = False
+                executor.shutdown()
+                executor = ProcessPoolExecutor(max_workers)
+                if len(lost) > 1:
+                    suspects.extend(lost)
+                elif lost and len(lost[0]) > 1:
+                    half = len(lost[0]) // 2
+                    suspects.extendleft([lost[0][half:], lost[0][:half]])
+                elif lost:
+                    write([_error_record(
+                        lost[0][0],
+                        BrokenProcessPool('the process running the task '
+                                          'has died'), 0
+                    )])
+    finally:
+        executor.shutdown()
+
+    return counts
+
+
+def _completed_tasks(output):
+    completed = set()
+    if exists(output):
+        with open(output) as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # the line cut off by the interruption
+
+                if record.get('status') == 'ok':
+                    completed.add(record['id'])
+
+    return completed
+
+
+def _run_chunk(tasks):
+    return [_run_task(task) for task in tasks]
+
+
+def _run_task(task):
+    start = perf_counter()
+    try:
+        solver = _find_solver(task['solver'])
+        args = {name: _to_array(value)
+                for name, value in task.get('args', {}).items()}
+        result = _to_json(solver(**args))
+    except Exception as error:
+        return _error_record(task, error, perf_counter() - start)
+
+    return {'id': task['id'], 'solver': task['solver'], 'status': 'ok',
+            'time': perf_counter() - start, 'result': result}
+
+
+def _error_record(task, error, time):
+    return {'id': task['id'], 'solver': task.get('solver'), 'status': 'error',
+            'time': time,
+            'error': ''.join(format_exception_only(type(error), error))}
+
+
+def _find_solver(name):
+    """Return the solver of the labs, the names imported by the modules
+    of the labs (e.g. os.replace) are not solvers.
+    """
+    package = import_module(__package__)
+    module, _, function = name.partition('.')
+    functions = package._FUNCTIONS.get(module, []) + ['solve_system']
+    if module not in package._MODULES or function not in functions:
+        raise ValueError('unknown solver {!r}'.format(name))
+
+    module = getattr(package, module)
+    solver = getattr(module, function, None)
+    if not isfunction(solver) or solver.__module__ != module.__name__:
+        raise ValueError('unknown solver {!r}'.format(name))
+
+    return solver
+
+
+def _to_array(value):
+    """Convert numeric lists to ndarrays, leave the rest (formulas) as is."""
+    if isinstance(value, (list, np.ndarray)):
+        array = np.asarray(value)
+        if array.dtype.kind in 'biuf':
+            return array.astype(float)
+        if array.dtype.kind == 'c':
+            return array
+        if array.dtype.kind == 'U' and array.ndim == 0:
+            return str(array)
+
+    return value
+
+
+def _to_json(value):
+    if isinstance(value, (np.ndarray, np.generic, complex)):
+        value = np.asarray(value)
+        if value.dtype.kind == 'c':
+            return {'real': value.real.tolist(), 'imag': value.imag.tolist()}
+        return value.tolist()
+    if isinstance(value, (tuple, list)):
+        return [_to_json(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if callable(value):
+        return None  # dense output of Dormand_Prince
+    return value
+
+
+def main(args=None):
+    parser = ArgumentParser(description='run the solvers over a manifest')
+    parser.add_argument('manifest', help='.jsonl or .npz file with tasks')
+    parser.add_argument('output', help='.jsonl file with results')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunksize', type=int, default=16)
+    args = parser.parse_args(args)
+
+    counts = run_tasks(read_manifest(args.manifest), args.output,
+                       args.workers, args.chunksize)
+    print('completed {ok}, failed {error}, skipped {skipped}'.format(**counts))
+    return 1 if counts['error'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,262 @@
+"""Asyncio front end which coalesces small independent problems
+into batched solves.
+
+Requests wait in the queue for at most max_wait seconds, compatible ones
+(the same solver and the same shape) are gathered into one vectorized
+solve of at most max_batch_size problems, then the future of every
+caller is resolved. The bounded queue makes callers wait when the
+service is overloaded.
+
+Usage:
+    python -m numerical_labworks.service [--requests 2000] [--concurrency 200]
+
+Classes:
+    SolverService(max_batch_size, max_wait, max_queue)
+Functions:
+    generate_load(service, nrequests, concurrency, size, seed) -> dict
+"""
+
+import asyncio
+from argparse import ArgumentParser
+from collections import defaultdict, deque
+from time import perf_counter
+
+import numpy as np
+
+from . import gaussel, tridiagonal, methods
+
+
+class SolverService:
+    """Coalesce requests to solvers into batched solves.
+
+    Arguments:
+    max_batch_size -- the largest number of problems in one solve
+    max_wait -- seconds the first request of a batch waits for others
+    max_queue -- size of the queue, callers wait when it is full
+    """
+
+    def __init__(self, max_batch_size=64, max_wait=0.002, max_queue=1024):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = asyncio.Queue(max_queue)
+        self._dispatcher = None
+        self._latencies = deque(maxlen=100000)
+        self._batch_sizes = []
+        self._started = self._finished = None
+
+    async def start(self):
+        """Start the dispatcher of requests."""
+        self._started = perf_counter()
+        self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def stop(self):
+        """Solve the queued requests and stop the dispatcher."""
+        await self._queue.join()
+        self._dispatcher.cancel()
+        try:
+            await self._dispatcher
+        except asyncio.CancelledError:
+            pass
+
+    async def solve_system(self, A, b):
+        """Solve system of linear equations A x = b and return x."""
+        A, b = np.asarray(A, float), np.asarray(b, float)
+        return await self._submit(('solve_system', A.shape), (A, b))
+
+    async def solve_TDMA(self, below, main, above, vector):
+        """Solve SoLE with tridiagonal matrix, see tridiagonal.solve_TDMA."""
+        problem = tuple(np.asarray(diagonal, float)
+                        for diagonal in (below, main, above, vector))
+        key = ('solve_TDMA',) + tuple(len(diagonal) for diagonal in problem)
+        return await self._submit(key, problem)
+
+    async def integrate(self, func, x0, y0, h, nsteps, params=None,
+                        method='Runge_Kutta'):
+        """Solve the first-order ODE(y' = f(x, y)), return xs and ys.
+
+        Arguments are the same as of methods.integrate_ensemble,
+        values of params are scalars, only the requests with the same
+        shape of y0 are solved together.
+        """
+        params = methods._with_defaults(params)
+        if isinstance(func, list):
+            func = tuple(func)  # the system is a part of the key
+
+        key = ('integrate', func, x0, h, nsteps, method, tuple(sorted(params)),
+               np.shape(y0))
+        return await self._submit(key, (y0, params))
+
+    def metrics(self):
+        """Return numbers of requests and batches, latencies
+        in seconds and throughput in requests per second.
+        """
+        latencies = np.array(self._latencies)
+        finished = self._finished or perf_counter()
+        nrequests = sum(self._batch_sizes)
+        return {
+            'requests': nrequests,
+            'batches': len(self._batch_sizes),
+            'mean_batch_size': nrequests / max(1, len(self._batch_sizes)),
+            'latency_mean': latencies.mean() if nrequests else 0.,
+            'latency_p50': np.percentile(latencies, 50) if nrequests else 0.,
+            'latency_p99': np.percentile(latencies, 99) if nrequests else 0.,
+            'throughput': nrequests / (finished - self._started),
+        }
+
+    async def _submit(self, key, problem):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((key, problem, future, perf_counter()))
+        return await future
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            requests = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(requests) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+
+                try:
+                    requests.append(
+                        await asyncio.wait_for(self._queue.get(), timeout)
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+            groups = defaultdict(list)
+            for request in requests:
+                try:
+                    groups[request[0]].append(request)
+                except Exception as error:
+                    # e.g. the unhashable argument, only this request fails;
+                    # the traceback refers to the frame of the dispatcher,
+                    # the caller must not be able to clear it
+                    _set_exception(request[2], error.with_traceback(None))
+
+            for key, group in groups.items():
+                await self._solve_batch(loop, key, group)
+
+            for _ in requests:
+                self._queue.task_done()
+
+    async def _solve_batch(self, loop, key, group):
+        problems = [problem for _, problem, _, _ in group]
+        try:
+            solutions = await loop.run_in_executor(
+                None, _BATCH_SOLVERS[key[0]], key, problems
+            )
+        except Exception as error:
+            if len(group) == 1:
+                _set_exception(group[0][2], error)
+            else:
+                # the problems are solved one by one, so only
+                # the callers of bad problems get the error
+                for request in group:
+                    await self._solve_batch(loop, key, [request])
+                return
+        else:
+            for (_, _, future, _), solution in zip(group, solutions):
+                if not future.cancelled():
+                    future.set_result(solution)
+
+        now = perf_counter()
+        self._latencies.extend(now - start for _, _, _, start in group)
+        self._batch_sizes.append(len(group))
+        self._finished = now
+
+
+def _set_exception(future, error):
+    if not future.cancelled():
+        future.set_exception(error)
+
+
+def _solve_systems(key, problems):
+    As, bs = zip(*problems)
+    return list(gaussel.solve_systems(np.array(As), np.array(bs)))
+
+
+def _solve_TDMAs(key, problems):
+    # solve_TDMA works elementwise, so the problems are stacked by columns
+    below, main, above, vector = (np.stack(diagonals, axis=1)
+                                  for diagonals in zip(*problems))
+    return list(tridiagonal.solve_TDMA(below, main, above, vector).T)
+
+
+def _integrate(key, problems):
+    _, func, x0, h, nsteps, method, names, shape = key
+    y0s, params = zip(*problems)
+    values = {name: np.array([p[name] for p in params]) for name in names}
+    if not shape:
+        xs, ys = methods.integrate_ensemble(func, x0, np.array(y0s, float), h,
+                                            nsteps, values, method)
+        return [(xs, ys_) for ys_ in ys]
+
+    solver = methods._SOLVERS[method]
+    if callable(func):
+        return [solver(func, x0, np.array(y0, float), h, nsteps)
+                for y0 in y0s]
+
+    # the formulas work elementwise, so the problems are stacked
+    # along the last axis of the state
+    f, values = methods._compile(list(func), values)
+    xs, ys = solver(lambda x_, y_: f(x_, y_, *values), x0,
+                    np.stack(y0s, axis=-1).astype(float), h, nsteps)
+    return [(xs, ys[..., i]) for i in range(len(problems))]
+
+
+_BATCH_SOLVERS = {
+    'solve_system': _solve_systems,
+    'solve_TDMA': _solve_TDMAs,
+    'integrate': _integrate,
+}
+
+
+async def generate_load(service, nrequests=2000, concurrency=200, size=8,
+                        seed=0):
+    """Send random small problems to the service concurrently
+    and return its metrics.
+
+    Arguments:
+    service -- started SolverService
+    nrequests -- number of requests of every kind
+    concurrency -- number of concurrent clients
+    size -- size of systems
+    seed -- seed of the random generator
+    """
+
+    rng = np.random.default_rng(seed)
+    func = '(1 - a * x * x - y * y) / (k - x * y)'
+
+    async def client(index):
+        for i in range(index, nrequests, concurrency):
+            A = rng.random((size, size)) + size * np.eye(size)
+            await service.solve_system(A, rng.random(size))
+            await service.solve_TDMA(rng.random(size), rng.random(size) + 2,
+                                     rng.random(size), rng.random(size))
+            await service.integrate(func, 0, rng.random(), 0.1, 10,
+                                    {'k': 3 + rng.random(), 'a': 3})
+
+    await asyncio.gather(*[client(i) for i in range(concurrency)])
+    return service.metrics()
+
+
+async def _main(args):
+    service = SolverService(args.max_batch_size, args.max_wait)
+    await service.start()
+    metrics = await generate_load(service, args.requests, args.concurrency,
+                                  args.size)
+    await service.stop()
+    for name, value in metrics.items():
+        print('{:16} {:.6g}'.format(name, value))
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='load generator of SolverService')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--size', type=int, default=8)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait', type=float, default=0.002)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,119 @@
+import json
+import os
+from multiprocessing import get_start_method
+from unittest import TestCase, main, skipIf
+from tempfile import TemporaryDirectory
+from os.path import join
+from numpy import array, allclose, savez
+from numerical_labworks import runner
+from numerical_labworks.runner import read_manifest, run_tasks
+
+
+def _crashing_run_task(task, run_task=runner._run_task):
+    if task['id'] == 'crash':
+        os._exit(1)
+
+    return run_task(task)
+
+
+class RunnerTestCase(TestCase):
+    def setUp(self):
+        """initial set up"""
+        self.A = [[2., -2, 3, 0.9], [-2, 3, -1, 1], [3, -1, 2, 0.5],
+                  [0.9, 1, 0.5, 2.5]]
+        self.b = [-5.00085, 2.76880, 0.89615, 1.35010]
+        self.tasks = [
+            {'id': 'gauss', 'solver': 'gaussel.solve_system',
+             'args': {'A': self.A, 'b': self.b}},
+            {'id': 'cholesky', 'solver': 'cholesky.solve_system',
+             'args': {'A': self.A, 'b': self.b}},
+            {'id': 'eigen', 'solver': 'jacobi.calculate_eigenvalues',
+             'args': {'A': [[2, 1], [1, 2]], 'eps': 1.e-10}},
+            {'id': 'bvp', 'solver': 'tridiagonal.solve_diffeq',
+             'args': {'px': '1', 'qx': '-1', 'fx': 'x', 'alpha1': -1,
+                      'alpha2': 1, 'A': 0, 'beta1': 1, 'beta2': 1, 'B': 1,
+                      'h': 0.1, 'a': 0, 'b': 1}},
+            {'id': 'ivp', 'solver': 'methods.Dormand_Prince',
+             'args': {'func': ['y2', '-y1'], 'x0': 0, 'y0': [0, 1],
+                      'x_end': 1}},
+            {'id': 'bad', 'solver': 'gaussel.solve_system',
+             'args': {'A': [[1, 2]], 'b': [1, 2, 3]}},
+            {'id': 'unknown', 'solver': 'os.system', 'args': {}},
+        ] + [
+            {'id': name, 'solver': name, 'args': {}}
+            for name in ['methods.replace', 'methods.savez',
+                         'methods.open_memmap', 'gaussel.np',
+                         'gaussel.print_log', 'tridiagonal._evaluate_on_grid',
+                         'methods', 'iterative.solve_system']
+        ]
+
+    def read_results(self, filename):
+        with open(filename) as file:
+            return {record['id']: record for record in map(json.loads, file)}
+
+    def test_run_tasks(self):
+        """Verify the failures are isolated and the rerun skips
+        the completed tasks
+        """
+        with TemporaryDirectory() as directory:
+            manifest = join(directory, 'tasks.jsonl')
+            with open(manifest, 'w') as file:
+                for task in self.tasks:
+                    file.write(json.dumps(task) + '\n')
+
+            output = join(directory, 'results.jsonl')
+            counts = run_tasks(read_manifest(manifest), output, 2, 2)
+            self.assertEqual(counts, {'ok': 5, 'error': 10, 'skipped': 0})
+            results = self.read_results(output)
+            x = array(results['gauss']['result'])
+            self.assertTrue(allclose(array(self.A).dot(x), self.b))
+            for task in self.tasks[6:]:
+                self.assertIn('unknown solver', results[task['id']]['error'])
+            self.assertGreater(results['eigen']['time'], 0)
+
+            counts = run_tasks(read_manifest(manifest), output, 2, 2)
+            self.assertEqual(counts, {'ok': 0, 'error': 10, 'skipped': 5})
+
+    def test_read_manifest_npz(self):
+        """Verify the tasks are read from .npz manifest"""
+        with TemporaryDirectory() as directory:
+            manifest = join(directory, 'tasks.npz')
+            savez(manifest, **{'t1.solver': 'gaussel.solve_system',
+                               't1.A': array(self.A), 't1.b': array(self.b),
+                               't2.solver': 'powiter.power_iteration_m',
+                               't2.A': array([[2, 1], [1, 2]]),
+                               't2.eps': 1.e-10})
+            tasks = list(read_manifest(manifest))
+            self.assertEqual([task['id'] for task in tasks], ['t1', 't2'])
+            self.assertEqual(set(tasks[0]['args']), {'A', 'b'})
+
+            output = join(directory, 'results.jsonl')
+            counts = run_tasks(tasks, output, 1)
+            self.assertEqual(counts['ok'], 2)
+            value, _ = self.read_results(output)['t2']['result']
+            self.assertAlmostEqual(value, 3)
+
+    @skipIf(get_start_method() != 'fork',
+            'the workers must inherit the patched runner')
+    def test_crashed_process(self):
+        """Verify only the task killing its process fails"""
+        tasks = [{'id': str(i), 'solver': 'gaussel.solve_system',
+                  'args': {'A': self.A, 'b': self.b}} for i in range(40)]
+        tasks.insert(13, {'id': 'crash', 'solver': 'gaussel.solve_system',
+                          'args': {'A': self.A, 'b': self.b}})
+        run_task, runner._run_task = runner._run_task, _crashing_run_task
+        try:
+            with TemporaryDirectory() as directory:
+                output = join(directory, 'results.jsonl')
+                counts = run_tasks(tasks, output, 2, 4)
+                self.assertEqual(counts, {'ok': 40, 'error': 1, 'skipped': 0})
+                results = self.read_results(output)
+                self.assertEqual(len(results), 41)
+                self.assertEqual(results['crash']['status'], 'error')
+                self.assertIn('died', results['crash']['error'])
+        finally:
+            runner._run_task = run_task
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import asyncio
+from unittest import TestCase, main
+from numpy import random, eye, allclose, ones
+from numerical_labworks import methods
+from numerical_labworks.service import SolverService, generate_load
+
+
+class SolverServiceTestCase(TestCase):
+    def setUp(self):
+        """initial set up"""
+        self.As = random.rand(30, 5, 5) + 5 * eye(5)
+        self.bs = random.rand(30, 5)
+        self.func = '(1 - a * x * x - y * y) / (k - x * y)'
+
+    def run_service(self, coroutine, **kwargs):
+        async def run():
+            service = SolverService(**kwargs)
+            await service.start()
+            try:
+                return await coroutine(service), service.metrics()
+            finally:
+                await asyncio.wait_for(service.stop(), 10)
+
+        return asyncio.run(run())
+
+    def test_coalescing(self):
+        """Verify the batched solutions coincide with the separate ones"""
+        async def solve(service):
+            return await asyncio.gather(
+                *[service.solve_system(A, b) for A, b in zip(self.As, self.bs)],
+                *[service.solve_TDMA(ones(6), 4 * ones(7), ones(6), b)
+                  for b in random.rand(10, 7)],
+                *[service.integrate(self.func, 0, y0, 0.1, 10)
+                  for y0 in (0, 0.1, 0.2)]
+            )
+
+        solutions, metrics = self.run_service(solve, max_wait=0.05)
+        for A, b, x in zip(self.As, self.bs, solutions[:30]):
+            self.assertTrue(allclose(A.dot(x), b))
+
+        xs, ys = solutions[-1]
+        self.assertTrue(allclose(ys, methods.Runge_Kutta(self.func, 0, 0.2,
+                                                         0.1, 10)[1]))
+        self.assertEqual(metrics['requests'], 43)
+        self.assertLess(metrics['batches'], 10)
+
+    def test_errors_and_backpressure(self):
+        """Verify the error of a batch is passed to its callers
+        and the small queue does not lose requests
+        """
+        async def solve(service):
+            with self.assertRaises(IndexError):
+                await service.solve_TDMA(ones(2), 3 * ones(3), ones(3), ones(4))
+
+            return await generate_load(service, 50, 20, 4)
+
+        _, metrics = self.run_service(solve, max_batch_size=8, max_queue=4)
+        self.assertEqual(metrics['requests'], 151)
+        self.assertLessEqual(metrics['mean_batch_size'], 8)
+
+    def test_systems_and_bad_requests(self):
+        """Verify systems of ODEs are integrated and a bad request
+        does not stop the service
+        """
+        system = ['y2', '-k * y1']
+
+        async def solve(service):
+            solutions = await asyncio.wait_for(asyncio.gather(
+                *[service.integrate(system, 0, [0, y0], 0.1, 10)
+                  for y0 in (1, 2)]
+            ), 5)
+            with self.assertRaises(TypeError):
+                await service.integrate({'y1': 'y2'}, 0, [0, 1], 0.1, 10)
+
+            x = await asyncio.wait_for(
+                service.solve_system(self.As[0], self.bs[0]), 5
+            )
+            return solutions, x
+
+        (solutions, x), _ = self.run_service(solve, max_wait=0.05)
+        for (xs, ys), y0 in zip(solutions, (1, 2)):
+            self.assertTrue(allclose(ys, methods.Runge_Kutta(
+                system, 0, [0, y0], 0.1, 10)[1]))
+
+        self.assertTrue(allclose(self.As[0].dot(x), self.bs[0]))
+
+
+if __name__ == '__main__':
+    main()